@@ -0,0 +1,153 @@
+import math
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _day_number(iso):
+    return date.fromisoformat(iso).toordinal() - EPOCH_ORDINAL
+
+
+def _num(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+# --- Daily Aggregate Index ---
+# (user, iso_date) -> calorie sum and entry count, plus each user's most recent
+# weight and when it was logged, so replaying an old day (a diary edit) can't
+# replace it. Appends and diary edits update it in place; sync() compares a cheap
+# fingerprint against the raw rows whenever the data version moves and only
+# rebuilds when they disagree (e.g. the other sister wrote from another worker).
+class DailyIndex:
+    def __init__(self):
+        self._days = {}  # user -> {iso_date: [calories, entries]}
+        self._last_weight = {}  # user -> (timestamp, weight)
+        self._versions = {}
+        self.rebuilds = 0
+        self._lock = threading.Lock()
+
+    # --- Lookups ---
+    def calories(self, user, iso):
+        return self._days.get(user, {}).get(iso, [0.0, 0])[0]
+
+    def entries(self, user, iso):
+        return self._days.get(user, {}).get(iso, [0.0, 0])[1]
+
+    def calories_between(self, user, start_iso, end_iso):
+        # Walks the calendar days in the range, not the rows
+        start, end = date.fromisoformat(start_iso), date.fromisoformat(end_iso)
+        days = self._days.get(user, {})
+        return sum(days.get((start + timedelta(d)).isoformat(), [0.0, 0])[0] for d in range((end - start).days + 1))
+
+    def latest_weight(self, user, default=None):
+        latest = self._last_weight.get(user)
+        return default if latest is None else latest[1]
+
+    # --- Incremental updates ---
+    def add(self, rows):
+        with self._lock:
+            for row in rows:
+                self._add(row)
+
+    def replace_day(self, user, iso, rows):
+        with self._lock:
+            self._days.setdefault(user, {}).pop(iso, None)
+            for row in rows:
+                self._add(row)
+
+    def _add(self, row):
+        iso = row.get("iso_date")
+        if not isinstance(iso, str):
+            iso = str(row["date"])[:10]
+        day = self._days.setdefault(row["user"], {}).setdefault(iso, [0.0, 0])
+        day[0] += _num(row.get("calories"))
+        day[1] += 1
+        when = _when(row)
+        latest = self._last_weight.get(row["user"])
+        if latest is None or (when is not None and (latest[0] is None or when >= latest[0])):
+            self._last_weight[row["user"]] = (when, _weight(row.get("weight")))
+
+    # --- Consistency ---
+    def sync(self, user, history, version):
+        if self._versions.get(user) == version:
+            return False
+        with self._lock:
+            rebuilt = not self._matches(user, history)
+            if rebuilt:
+                self._rebuild(user, history)
+                self.rebuilds += 1
+            self._versions[user] = version
+        return rebuilt
+
+    def _fingerprint(self, user):
+        days = self._days.get(user, {})
+        count = sum(d[1] for d in days.values())
+        total = sum(d[0] for d in days.values())
+        weighted = sum(d[0] * _day_number(iso) for iso, d in days.items())
+        return count, total, weighted
+
+    def _matches(self, user, history):
+        if history.empty:
+            return not self._days.get(user)
+        dated = history[history["iso_date"].notna()]
+        cals = pd.to_numeric(dated["calories"], errors="coerce").fillna(0).to_numpy(float)
+        day_numbers = dated["dt"].to_numpy("datetime64[D]").astype(np.int64)
+        count, total, weighted = self._fingerprint(user)
+        return (
+            count == len(dated)
+            and math.isclose(total, cals.sum(), abs_tol=1e-6)
+            and math.isclose(weighted, float(cals @ day_numbers), rel_tol=1e-9, abs_tol=1e-6)
+            and _same(self.latest_weight(user), _latest(history)[1])
+        )
+
+    def _rebuild(self, user, history):
+        self._days[user] = {}
+        self._last_weight.pop(user, None)
+        if history.empty:
+            return
+        dated = history[history["iso_date"].notna()]
+        cals = pd.to_numeric(dated["calories"], errors="coerce").fillna(0)
+        grouped = cals.groupby(dated["iso_date"], observed=True).agg(["sum", "count"])
+        self._days[user] = {iso: [float(s), int(c)] for iso, s, c in zip(grouped.index, grouped["sum"], grouped["count"])}
+        self._last_weight[user] = _latest(history)
+
+
+def _when(row):
+    when = row.get("dt")
+    if not isinstance(when, pd.Timestamp):
+        when = pd.to_datetime(str(row.get("date")), errors="coerce", format="mixed")
+    return None if pd.isna(when) else when
+
+
+def _latest(history):
+    # (timestamp, weight) of the latest-dated row, the last one on a tie
+    dt = history["dt"].reset_index(drop=True)
+    if dt.isna().all():
+        return None, _weight(history["weight"].iloc[-1])
+    pos = dt[::-1].idxmax()
+    return dt.iloc[pos], _weight(history["weight"].iloc[pos])
+
+
+def _weight(value):
+    # Weights are float32 in the log frame; 69.9 should not read 69.9000015258789
+    try:
+        return round(float(value), 2)
+    except (TypeError, ValueError):
+        return value
+
+
+def _same(a, b):
+    if a is None:
+        return False
+    try:
+        return math.isclose(float(a), float(b)) or (math.isnan(float(a)) and math.isnan(float(b)))
+    except (TypeError, ValueError):
+        return a == b
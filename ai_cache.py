@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from food_search import tokenize
+
+
+def normalise_query(text):
+    # "Chicken  Thighs!" and "chicken thigh" share one entry
+    return " ".join(tokenize(text))
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+# --- Persistent AI Response Cache ---
+# SQLite file shared by every session (and every worker on the host). Entries
+# expire after ttl seconds and the least recently used are evicted beyond
+# max_entries. Identical requests arriving while one is already running wait
+# for that call instead of hitting the model again.
+class AICache:
+    def __init__(self, path=None, max_entries=5000, ttl=30 * 24 * 3600.0, clock=time.time):
+        if path is None:
+            root = os.environ.get("SISFIT_CACHE_DIR") or tempfile.gettempdir()
+            os.makedirs(root, exist_ok=True)
+            path = os.path.join(root, "sisfit-ai-cache.sqlite3")
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = self.misses = self.coalesced = self.errors = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+        self._db.commit()
+
+    @staticmethod
+    def make_key(namespace, version, query):
+        return f"{namespace}:v{version}:{normalise_query(query)}"
+
+    def get(self, key):
+        with self._lock:
+            raw = self._lookup(key)
+        return None if raw is None else json.loads(raw)
+
+    def _lookup(self, key):
+        # Caller holds _lock; returns the stored JSON text, or None
+        now = self._clock()
+        row = self._db.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[1] > self.ttl:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+        self._db.execute("UPDATE entries SET used = ? WHERE key = ?", (now, key))
+        self._db.commit()
+        return row[0]
+
+    def put(self, key, value):
+        now = self._clock()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, json.dumps(value), now, now))
+            self._db.execute(
+                "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def keys(self, prefix):
+        with self._lock:
+            rows = self._db.execute("SELECT key FROM entries WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff")).fetchall()
+        return [r[0] for r in rows]
+
+    def get_or_compute(self, key, compute, keep=bool):
+        # keep(value) decides whether a result is worth caching (not errors / empties)
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        raw = None
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                # A leader may have stored the value and left since the check
+                # above; only start a new call if it is still missing
+                raw = self._lookup(key)
+                if raw is None:
+                    flight = self._inflight[key] = _InFlight()
+        if raw is not None:
+            self.hits += 1
+            return json.loads(raw)
+        if not leader:
+            self.coalesced += 1
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        self.misses += 1
+        try:
+            flight.value = compute()
+            if keep(flight.value):
+                self.put(key, flight.value)
+            return flight.value
+        except Exception as e:
+            self.errors += 1
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            size = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses + self.coalesced
+        saved = self.hits + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "entries": size,
+            "hit_rate": saved / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,416 @@
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DailyIndex
+from ai_cache import AICache
+from food_search import FoodIndex, _synthetic_catalogue
+from model_router import FakeModel, ModelRouter
+from partitions import LOG_COLUMNS, PartitionedLog
+from rowdiff import apply_diff, diff_rows
+from storage import ConflictError, CsvStore, blob_sha, to_csv_bytes
+from trends import FREQUENCIES, TrendsEngine
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(HERE, "bench_baseline.json")
+
+FOODS = [
+    ("Oats with milk", 320), ("Toast & butter", 250), ("Weet-Bix x2", 110), ("Greek yoghurt", 180),
+    ("Banana", 105), ("Apple", 80), ("Ham sandwich", 420), ("Sushi pack", 380), ("Chicken salad", 350),
+    ("Leftover pasta", 520), ("Mince & rice", 610), ("Fish and chips", 900), ("Roast chicken dinner", 650),
+    ("Butter chicken", 720), ("Stir fry", 480), ("Pizza slice", 290), ("Flat white", 120), ("Chocolate bar", 240),
+    ("Anchor Blue Milk (Standard)", 63), ("Watties Baked Beans", 90), ("Protein shake", 160), ("Muesli bar", 130),
+]
+MEALS = np.array(["Breakfast", "Lunch", "Dinner", "Snack"])
+
+
+# --- Synthetic data ---
+def generate_log(rows, users=("Me", "Sister"), years=3, end="2026-10-01", seed=0):
+    # Several entries a day per user over `years`, with meal-appropriate times
+    # and a slowly drifting weight carried on every row (as log_entry does)
+    rng = np.random.default_rng(seed)
+    days = int(years * 365.25)
+    start = np.datetime64(end, "m") - np.timedelta64(days, "D")
+    day = np.sort(rng.integers(0, days, rows))
+    meal = rng.choice(4, rows, p=[0.25, 0.3, 0.3, 0.15])
+    minutes = np.array([7, 12, 18, 15])[meal] * 60 + rng.integers(0, 120, rows)
+    stamps = start + day.astype("timedelta64[D]") + minutes.astype("timedelta64[m]")
+    who = rng.integers(0, len(users), rows)
+    walks = 65 + 10 * rng.random((len(users), 1)) + np.cumsum(rng.normal(0, 0.08, (len(users), days)), axis=1)
+    food = rng.integers(0, len(FOODS), rows)
+    base_cals = np.array([c for _, c in FOODS])[food]
+    order = np.argsort(stamps, kind="stable")
+    df = pd.DataFrame({
+        "date": np.char.replace(np.datetime_as_string(stamps), "T", " "),
+        "user": np.array(users, dtype=object)[who],
+        "weight": walks[who, day].round(1),
+        "calories": (base_cals * rng.uniform(0.6, 1.6, rows)).round().astype(int),
+        "notes": np.array([n for n, _ in FOODS], dtype=object)[food],
+        "meal_type": MEALS[meal],
+        "id": [f"{x:012x}" for x in rng.integers(0, 2**48, rows)],
+    })
+    return df.iloc[order].reset_index(drop=True)[LOG_COLUMNS]
+
+
+# --- In-memory stand-ins ---
+class FakeGitHub:
+    # Same interface as LocalBackend/GitHubBackend, held in a dict. Every API
+    # call costs `latency` plus payload / bytes_per_second; directory listings
+    # are cached for listing_ttl like GitHubBackend's.
+    def __init__(self, latency=0.05, bytes_per_second=20e6, listing_ttl=2.0):
+        self.files = {}
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+        self.listing_ttl = listing_ttl
+        self.calls = self.bytes = 0
+        self._listed = {}
+        self._lock = threading.Lock()
+
+    def _api(self, nbytes=0):
+        self.calls += 1
+        self.bytes += nbytes
+        delay = self.latency + nbytes / self.bytes_per_second
+        if delay > 0:
+            time.sleep(delay)
+
+    def sha(self, path, fresh=False):
+        directory = os.path.dirname(path)
+        if fresh or time.monotonic() - self._listed.get(directory, -1e9) > self.listing_ttl:
+            self._api()
+            self._listed[directory] = time.monotonic()
+        data = self.files.get(path)
+        return blob_sha(data) if data is not None else None
+
+    def read(self, path, sha=None):
+        data = self.files.get(path)
+        if data is None:
+            raise FileNotFoundError(path)
+        self._api(len(data))
+        return data, blob_sha(data)
+
+    def write(self, path, data, message, expected_sha=None):
+        return self.write_many({path: data}, message, {path: expected_sha} if expected_sha else None)[path]
+
+    def write_many(self, files, message, expected=None):
+        pairs = list(files.items() if isinstance(files, dict) else files)
+        with self._lock:
+            for path, sha in (expected or {}).items():
+                current = self.files.get(path)
+                if (blob_sha(current) if current is not None else None) != sha:
+                    raise ConflictError(path)
+            # blobs + tree + commit + ref update
+            self._api(sum(len(d) for _, d in pairs))
+            self.calls += 3
+            for path, data in pairs:
+                self.files[path] = data.encode() if isinstance(data, str) else data
+        return {path: blob_sha(self.files[path]) for path, _ in pairs}
+
+
+def fake_router(latency=0.8):
+    return ModelRouter(
+        [("flash", FakeModel("Generic|100g|50|gram", latency=latency, jitter=latency / 4, seed=1)),
+         ("pro", FakeModel("Generic|100g|50|gram", latency=latency * 2, seed=2))],
+        hedge_after=3.0, deadline=20.0,
+    )
+
+
+# --- Hot paths ---
+# Each case does its setup and returns the callable that is timed; the
+# callable mirrors what fitness_app.py does on a rerun or button press.
+class Context:
+    def __init__(self, rows, github_latency, model_latency, tmp):
+        self.rows = rows
+        self.user = "Me"
+        self.backend = FakeGitHub(latency=0)
+        self.model_latency = model_latency
+        self.tmp = tmp
+        log = generate_log(rows)
+        self.backend.files["data.csv"] = to_csv_bytes(log)
+        del log
+        PartitionedLog(CsvStore(self.backend)).migrate()
+        self.backend.latency = github_latency
+        self.backend.calls = self.backend.bytes = 0
+
+    def log(self, legacy=False, store=None):
+        # A root with no manifest makes PartitionedLog read data.csv as before
+        return PartitionedLog(store or CsvStore(self.backend), root="legacy" if legacy else "data")
+
+
+def case_load_legacy_cold(ctx):
+    return lambda: ctx.log(legacy=True).read()
+
+
+def _recent(log, ctx):
+    # The app's up-front window, as of the last day in the synthetic log
+    return log.recent_months(ctx.user, today=date.fromisoformat(log.months(ctx.user)[-1] + "-28"))
+
+
+def case_load_cold(ctx):
+    # What a new session reads before its first paint
+    def run():
+        log = ctx.log()
+        return log.read(ctx.user, months=_recent(log, ctx))
+    return run
+
+
+def case_load_all_cold(ctx):
+    # Opening Trends in a new session: every shard
+    return lambda: ctx.log().read(ctx.user)
+
+
+def case_load_warm(ctx):
+    log = ctx.log()
+    months = _recent(log, ctx)
+    log.read(ctx.user, months=months)
+    return lambda: log.read(ctx.user, months=months)
+
+
+def case_user_filter(ctx):
+    df = ctx.log(legacy=True).read()
+    return lambda: df[df["user"] == ctx.user].copy()
+
+
+def case_daily_index(ctx):
+    history = ctx.log().read(ctx.user)
+    last = history["iso_date"].iloc[-1]
+
+    def run():
+        index = DailyIndex()
+        index.sync(ctx.user, history, "v1")
+        return index.calories(ctx.user, last), index.calories_between(ctx.user, last, last)
+    return run
+
+
+def case_diary_save(ctx):
+    log = ctx.log()
+    month = log.months(ctx.user)[-1]
+    history = log.read(ctx.user, months=[month])
+
+    def run():
+        # Edit one row, delete one, add one on the latest logged day
+        day = history[history["iso_date"] == history["iso_date"].iloc[-1]]
+        rows = day[["id", "meal_type", "notes", "calories"]].reset_index(drop=True)
+        edited = rows.copy()
+        edited.iloc[0, edited.columns.get_loc("calories")] = int(edited["calories"].iloc[0]) + 1
+        if len(edited) > 1:
+            edited = edited.iloc[:-1]
+        edited = pd.concat([edited, pd.DataFrame([{"id": None, "meal_type": "Snack", "notes": "bench", "calories": 100}])], ignore_index=True)
+        diff = diff_rows(rows, edited, ["meal_type", "notes", "calories"])
+        defaults = {"date": day.iloc[0]["date"], "user": ctx.user, "weight": day.iloc[0]["weight"]}
+        log.modify(ctx.user, month, lambda shard: apply_diff(shard, diff, defaults), "bench edit")
+    return run
+
+
+def case_append(ctx):
+    log = ctx.log()
+    row = generate_log(1, users=(ctx.user,), end="2026-09-30").iloc[0].to_dict()
+    return lambda: log.append([row], "bench append")
+
+
+def case_trends(ctx):
+    history = ctx.log().read(ctx.user)
+
+    def run():
+        engine = TrendsEngine(max_points=400)
+        return [engine.charts(ctx.user, "v1", lambda: history, freq) for freq in FREQUENCIES.values()]
+    return run
+
+
+# Row-count independent: run once per invocation
+def case_search_local(ctx):
+    index = FoodIndex.build(_synthetic_catalogue(20000))
+    queries = ["milk", "anchr mlk", "greek yoghurt", "lewis road ice cream"]
+    return lambda: [index.search(q) for q in queries]
+
+
+def case_search_ai_miss(ctx):
+    cache = AICache(os.path.join(ctx.tmp, "miss.sqlite3"))
+    router = fake_router(ctx.model_latency)
+    counter = iter(range(10**9))
+
+    def run():
+        query = f"unknown food {next(counter)}"
+        return cache.get_or_compute(AICache.make_key("brands", 1, query), lambda: router.generate(query))
+    return run
+
+
+def case_search_ai_hit(ctx):
+    cache = AICache(os.path.join(ctx.tmp, "hit.sqlite3"))
+    key = AICache.make_key("brands", 1, "feijoa")
+    cache.put(key, [{"name": "Generic", "unit": "100g", "cals": 50, "calc": "gram"}])
+    return lambda: cache.get_or_compute(key, lambda: fake_router(ctx.model_latency).generate("feijoa"))
+
+
+def case_cold_start(ctx):
+    # A new worker: fresh interpreter and empty caches, one run of the app
+    # script (AppTest, no server) up to the end of its first rerun. Wall
+    # time includes importing streamlit, pandas and whatever the script does.
+    root = os.path.join(ctx.tmp, "app")
+    for path, data in ctx.backend.files.items():
+        os.makedirs(os.path.dirname(os.path.join(root, path)), exist_ok=True)
+        with open(os.path.join(root, path), "wb") as f:
+            f.write(data)
+    shutil.copy(os.path.join(HERE, "profiles.csv"), root)
+    script = (
+        "import sys; from streamlit.testing.v1 import AppTest; "
+        "at = AppTest.from_file(sys.argv[1], default_timeout=120); at.secrets['GITHUB_TOKEN'] = 'x'; at.run(); "
+        "sys.exit(1 if at.exception else 0)"
+    )
+
+    def run():
+        cache = tempfile.mkdtemp(dir=ctx.tmp)
+        env = {**os.environ, "SISFIT_LOCAL_DIR": root, "SISFIT_CACHE_DIR": cache, "SISFIT_TRACE_FILE": ""}
+        subprocess.run([sys.executable, "-c", script, os.path.join(HERE, "fitness_app.py")], env=env, cwd=HERE, check=True, capture_output=True)
+    return run
+
+
+SIZED_CASES = [case_load_legacy_cold, case_load_cold, case_load_all_cold, case_load_warm, case_user_filter,
+               case_daily_index, case_diary_save, case_append, case_trends]
+FIXED_CASES = [case_search_local, case_search_ai_miss, case_search_ai_hit, case_cold_start]
+
+
+# --- Runner ---
+def measure(ctx, case, repeat, memory=True):
+    run = case(ctx)
+    calls, sent = ctx.backend.calls, ctx.backend.bytes
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t0)
+    best = min(times)
+    result = {
+        # Best of the repeats: the run least disturbed by the rest of the machine
+        "ms": best * 1000,
+        # How far the repeats spread; kept in the baseline as the case's noise margin
+        "noise": (max(times) - best) / best if best else 0.0,
+        "api_calls": (ctx.backend.calls - calls) / repeat,
+        "kib": (ctx.backend.bytes - sent) / repeat / 1024,
+    }
+    if memory:
+        # Separate pass: tracemalloc slows pandas down too much to time under it
+        run = case(ctx)
+        gc.collect()
+        tracemalloc.start()
+        run()
+        result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return result
+
+
+def combine(passes):
+    # The last pass (the one with memory figures) at the best pass's time. Its
+    # noise is the wider of the spread within that pass and between passes,
+    # which is what separate --check runs vary by.
+    best = min(passes, key=lambda r: r["ms"])
+    between = max(r["ms"] for r in passes) / best["ms"] - 1 if best["ms"] else 0.0
+    return {**passes[-1], "ms": best["ms"], "noise": max(best["noise"], between)}
+
+
+def planned(args):
+    # (rows, fixed, cases) per log size, with --only applied; fixed cases
+    # don't depend on the log size and run once, against the first
+    plan = [(rows, False, SIZED_CASES) for rows in args.rows] + [(args.rows[0], True, FIXED_CASES)]
+    for rows, fixed, cases in plan:
+        cases = [c for c in cases if not args.only or args.only in c.__name__]
+        if cases:
+            yield rows, fixed, cases
+
+
+def case_name(case):
+    return case.__name__[len("case_"):]
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"config": {}, "results": {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the app's hot paths against synthetic logs and fake GitHub/Gemini backends")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="Log sizes, e.g. 10000 1000000 10000000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--passes", type=int, default=1, help="Run the suite this many times (e.g. 5 with --save-baseline, so noise margins are measured)")
+    parser.add_argument("--github-latency", type=float, default=0.05, help="Seconds per fake GitHub API call")
+    parser.add_argument("--model-latency", type=float, default=0.8, help="Seconds per fake Gemini call")
+    parser.add_argument("--only", help="Run cases whose name contains this")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Write results to {os.path.basename(BASELINE_FILE)}")
+    parser.add_argument("--check", action="store_true", help="Exit 1 if any case regressed past --tolerance")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Slowdown ratio that counts as a regression, plus each case's recorded noise")
+    args = parser.parse_args()
+
+    config = {"github_latency": args.github_latency, "model_latency": args.model_latency}
+    baseline = load_baseline()
+    if baseline["results"] and baseline["config"] != config:
+        print(f"note: baseline was recorded with {baseline['config']}, comparisons are not like-for-like")
+    results = {}
+    earlier = {}  # key -> results of the passes before the last
+    regressions = []
+    for p in range(args.passes - 1):
+        print(f"pass {p + 1}/{args.passes}...", flush=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            for rows, fixed, cases in planned(args):
+                ctx = Context(rows, args.github_latency, args.model_latency, tmp)
+                for case in cases:
+                    key = case_name(case) if fixed else f"{case_name(case)}@{rows}"
+                    earlier.setdefault(key, []).append(measure(ctx, case, args.repeat, memory=False))
+                del ctx
+    print(f"{'case':24} {'rows':>10} {'ms':>10} {'peak MB':>8} {'API':>5} {'KiB':>9}  vs baseline")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows, fixed, cases in planned(args):
+            ctx = Context(rows, args.github_latency, args.model_latency, tmp)
+            for case in cases:
+                name = case_name(case)
+                key = name if fixed else f"{name}@{rows}"
+                r = measure(ctx, case, args.repeat, memory=not args.no_memory)
+                r = results[key] = combine(earlier.get(key, []) + [r])
+                old = baseline["results"].get(key)
+                delta = ""
+                if old:
+                    # Sub-millisecond cases are too noisy to flag, and a case whose
+                    # timings spread widely when the baseline was recorded gets that
+                    # much more room (up to 1x)
+                    limit = args.tolerance + min(old.get("noise", 0.0), 1.0)
+                    slower = lambda: r["ms"] > old["ms"] * limit and r["ms"] - old["ms"] > 1.0
+                    if slower():
+                        # Only a slowdown that shows up again on a second measurement counts
+                        r["ms"] = min(r["ms"], measure(ctx, case, max(args.repeat, 3), memory=False)["ms"])
+                    delta = f"{r['ms'] / old['ms'] if old['ms'] else 1.0:5.2f}x"
+                    if slower():
+                        delta += "  REGRESSION"
+                        regressions.append(key)
+                rows_label = "-" if fixed else f"{rows:,}"
+                peak = f"{r['peak_mb']:8.1f}" if "peak_mb" in r else f"{'-':>8}"
+                print(f"{name:24} {rows_label:>10} {r['ms']:10.1f} {peak} {r['api_calls']:5.0f} {r['kib']:9.0f}  {delta}", flush=True)
+            del ctx
+
+    if args.save_baseline:
+        baseline = {"config": config, "results": {**(baseline["results"] if baseline["config"] == config else {}), **results}}
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"Saved {len(results)} results to {BASELINE_FILE}")
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+        if args.check:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from food_search import EXTRA_WEIGHT, NAME_WEIGHT, match_token, rank, tokenize, trigrams
+
+FORMAT = 1
+
+# Source column names (lower-cased, punctuation as "_") -> catalogue field
+COLUMN_ALIASES = {
+    "name": ["name", "product", "product_name", "description", "food"],
+    "brand": ["brand", "brand_name", "manufacturer"],
+    "unit": ["unit", "serving", "serving_size", "per"],
+    "cals": ["cals", "calories", "kcal", "energy_kcal", "calories_kcal"],
+    "kj": ["kj", "energy_kj"],
+    "calc": ["calc", "calc_type"],
+    "protein": ["protein", "protein_g"],
+    "carbs": ["carbs", "carbohydrate", "carbohydrate_g", "carbs_g"],
+    "fat": ["fat", "fat_g", "total_fat"],
+}
+_PER_AMOUNT = re.compile(r"^\s*\d+(\.\d+)?\s*(g|ml)\s*$", re.I)
+
+
+# --- Build ---
+# Everything a search needs is in indexed tables, so a query touches a handful
+# of B-tree pages through the memory map and nothing is loaded up front:
+#   items     id -> name, brand, unit, cals, calc, macros
+#   postings  (token, item) -> field weight, name length   (the name index)
+#   vocab     token -> trigram count                       (prefix lookups)
+#   grams     (trigram, token)                             (typo lookups)
+def _number(value):
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def _rows(source):
+    with open(source, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        lower = {re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_"): name for name in reader.fieldnames or []}
+        columns = {field: next((lower[a] for a in aliases if a in lower), None) for field, aliases in COLUMN_ALIASES.items()}
+        if columns["name"] is None:
+            raise ValueError(f"No name column found in {reader.fieldnames}")
+        for row in reader:
+            get = lambda field: row.get(columns[field]) if columns[field] else None
+            name = (get("name") or "").strip()
+            cals = _number(get("cals"))
+            if cals is None and _number(get("kj")) is not None:
+                cals = _number(get("kj")) / 4.184
+            if not name or cals is None:
+                continue
+            unit = (get("unit") or "100g").strip()
+            calc = (get("calc") or ("gram" if _PER_AMOUNT.match(unit) else "item")).strip().lower()
+            yield name, (get("brand") or "").strip(), unit, int(round(cals)), calc, _number(get("protein")), _number(get("carbs")), _number(get("fat"))
+
+
+def build(source, path):
+    # Written to a temp file and swapped in, so running apps keep their copy
+    tmp = path + ".building"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    db = sqlite3.connect(tmp)
+    db.executescript("""
+        PRAGMA journal_mode = OFF;
+        PRAGMA synchronous = OFF;
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, brand TEXT, unit TEXT, cals INTEGER, calc TEXT, protein REAL, carbs REAL, fat REAL);
+        CREATE TABLE postings (token TEXT, item INTEGER, weight REAL, name_len INTEGER, PRIMARY KEY (token, item)) WITHOUT ROWID;
+        CREATE TABLE vocab (token TEXT PRIMARY KEY, grams INTEGER) WITHOUT ROWID;
+        CREATE TABLE grams (gram TEXT, token TEXT, PRIMARY KEY (gram, token)) WITHOUT ROWID;
+    """)
+    postings = {}
+    count = 0
+    for item_id, row in enumerate(_rows(source)):
+        db.execute("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (item_id,) + row)
+        name, brand = row[0], row[1]
+        # Same field weights as FoodIndex: name words over brand
+        for tok in tokenize(brand):
+            postings.setdefault((tok, item_id), (EXTRA_WEIGHT, len(name)))
+        for tok in tokenize(name):
+            postings[(tok, item_id)] = (NAME_WEIGHT, len(name))
+        count += 1
+    # Inserting in key order keeps the WITHOUT ROWID B-trees densely packed
+    db.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", ((t, i, w, n) for (t, i), (w, n) in sorted(postings.items())))
+    vocab = sorted({t for t, _ in postings})
+    del postings
+    db.executemany("INSERT INTO vocab VALUES (?, ?)", ((t, len(trigrams(t))) for t in vocab))
+    db.executemany("INSERT INTO grams VALUES (?, ?)", sorted((g, t) for t in vocab for g in trigrams(t)))
+    db.executemany("INSERT INTO meta VALUES (?, ?)", [("format", str(FORMAT)), ("items", str(count)), ("source", os.path.basename(source))])
+    db.commit()
+    db.execute("VACUUM")
+    db.close()
+    os.replace(tmp, path)
+    return count
+
+
+# --- Query ---
+# The same scoring as FoodIndex.search (food_search.match_token / rank), with
+# candidate tokens and postings looked up in the file.
+# Connections are per thread and read-only; pages come in through mmap as
+# they are touched, so opening costs the same at 1k or 1M items.
+class Catalogue:
+    def __init__(self, path, min_similarity=0.5, max_prefix=200, mmap_size=256 * 2**20):
+        self.path = path
+        self.min_similarity = min_similarity
+        self.max_prefix = max_prefix
+        self.mmap_size = mmap_size
+        self._local = threading.local()
+
+    @classmethod
+    def open(cls, path):
+        # None when no catalogue has been built, so callers can skip it
+        return cls(path) if path and os.path.exists(path) else None
+
+    @property
+    def db(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(f"file:{self.path}?mode=ro&immutable=1", uri=True, check_same_thread=False)
+            db.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            self._local.db = db
+        return db
+
+    def __len__(self):
+        return int(self.db.execute("SELECT value FROM meta WHERE key = 'items'").fetchone()[0])
+
+    def _prefixed(self, qtok):
+        rows = self.db.execute(
+            "SELECT token FROM vocab WHERE token >= ? AND token < ? LIMIT ?", (qtok, qtok + "\U0010ffff", self.max_prefix)
+        ).fetchall()
+        return [tok for (tok,) in rows]
+
+    def _overlaps(self, qgrams):
+        qgrams = sorted(qgrams)
+        return self.db.execute(
+            f"SELECT g.token, v.grams, COUNT(*) FROM grams g JOIN vocab v ON v.token = g.token WHERE g.gram IN ({','.join('?' * len(qgrams))}) GROUP BY g.token",
+            qgrams,
+        ).fetchall()
+
+    def _matches(self, qtok):
+        return match_token(qtok, self._prefixed(qtok), self._overlaps, self.min_similarity)
+
+    def search(self, query, limit=8):
+        lengths = {}
+
+        def postings(tokens):
+            found = defaultdict(dict)
+            for tok, item, weight, name_len in self.db.execute(
+                f"SELECT token, item, weight, name_len FROM postings WHERE token IN ({','.join('?' * len(tokens))})", list(tokens)
+            ):
+                found[tok][item] = weight
+                lengths[item] = name_len
+            return found
+
+        ids = rank(tokenize(query), self._matches, postings, lengths.__getitem__, limit)
+        if not ids:
+            return []
+        rows = {r[0]: r for r in self.db.execute(
+            f"SELECT id, name, unit, cals, calc, protein, carbs, fat FROM items WHERE id IN ({','.join('?' * len(ids))})", ids
+        )}
+        results = []
+        for i in ids:
+            _, name, unit, cals, calc, protein, carbs, fat = rows[i]
+            item = {"name": name, "unit": unit, "cals": cals, "calc": calc}
+            item.update({k: v for k, v in (("protein", protein), ("carbs", carbs), ("fat", fat)) if v is not None})
+            results.append(item)
+        return results
+
+
+# --- Benchmark: cold start and RSS vs catalogue size ---
+def _synthetic_csv(path, n):
+    from food_search import _synthetic_catalogue
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["brand", "name", "unit", "calories", "protein", "carbs", "fat"])
+        for brand, items in _synthetic_catalogue(n).items():
+            for item in items:
+                writer.writerow([brand, item["name"], item["unit"], item["cals"], 5.0, 10.0, 2.5])
+
+
+def benchmark(sizes=(1_000, 10_000, 100_000), queries=("milk", "anchr mlk", "greek yoghurt", "lewis road ice cream")):
+    import subprocess
+    import sys
+    import tempfile
+    probe = (
+        # VmHWM, not ru_maxrss: the latter keeps the forking parent's peak
+        "import sys, time; t0 = time.perf_counter(); from catalogue import Catalogue; c = Catalogue(sys.argv[1]); "
+        "c.search('milk'); t1 = time.perf_counter(); "
+        "hwm = int(open('/proc/self/status').read().split('VmHWM:')[1].split()[0]); "
+        "print(f'{(t1 - t0) * 1000:.1f} {hwm / 1024:.1f}')"
+    )
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'items':>9} {'build s':>8} {'file MB':>8} {'cold ms':>8} {'RSS MB':>7}  " + "  ".join(f"{q!r:>14}" for q in queries))
+        for n in sizes:
+            src, db_path = os.path.join(tmp, f"{n}.csv"), os.path.join(tmp, f"{n}.sqlite3")
+            _synthetic_csv(src, n)
+            t0 = time.perf_counter()
+            build(src, db_path)
+            build_s = time.perf_counter() - t0
+            # Fresh interpreter: import + open + first query, and its peak RSS
+            cold_ms, rss = subprocess.run([sys.executable, "-c", probe, db_path], cwd=here, capture_output=True, text=True, check=True).stdout.split()
+            cat = Catalogue(db_path)
+            cat.search("warm up")
+            per_query = []
+            for q in queries:
+                t0 = time.perf_counter()
+                for _ in range(20):
+                    cat.search(q)
+                per_query.append(f"{(time.perf_counter() - t0) / 20 * 1000:11.2f} ms")
+            print(f"{n:9,} {build_s:8.1f} {os.path.getsize(db_path) / 2**20:8.1f} {float(cold_ms):8.1f} {float(rss):7.1f}  " + "  ".join(per_query))
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build / query the on-disk food catalogue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="Compile a product CSV (name, brand, unit, calories or kJ, protein, carbs, fat)")
+    p.add_argument("source")
+    p.add_argument("out", nargs="?", default="catalogue.sqlite3")
+    p = sub.add_parser("search")
+    p.add_argument("query")
+    p.add_argument("--db", default="catalogue.sqlite3")
+    p = sub.add_parser("bench", help="Cold start, RSS and query latency for synthetic catalogues")
+    p.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+    if args.command == "build":
+        t0 = time.perf_counter()
+        n = build(args.source, args.out)
+        print(f"Built {args.out}: {n:,} items, {os.path.getsize(args.out) / 2**20:.1f} MB in {time.perf_counter() - t0:.1f}s")
+    elif args.command == "search":
+        for item in Catalogue(args.db).search(args.query):
+            print(item)
+    else:
+        benchmark(args.sizes)
@@ -1,18 +1,33 @@
+from time import perf_counter
+script_start = perf_counter()  # before the imports, so a cold worker's first trace includes them
 import streamlit as st
 import pandas as pd
 from datetime import datetime, date, time, timedelta
-from github import Github
-import io
-import plotly.express as px
-import google.generativeai as genai
-from PIL import Image
-import time as time_lib
+import os
+# plotly, google.generativeai, PIL and github are imported on first use;
+# most sessions never open the charts or the camera
+from storage import CsvStore, GitHubBackend, LocalBackend, add_date_columns, new_row_id
+from mirror import ColumnarMirror
+from journal import WriteBehindJournal
+from partitions import PartitionedLog, month_keys
+from aggregates import DailyIndex
+from rowdiff import apply_diff, diff_rows
+from food_search import FoodIndex
+from ai_cache import AICache
+from model_router import ModelRouter
+from trends import FREQUENCIES, TrendsEngine
+from importer import import_log
+from tracing import Tracer, span, traced
+from schema import compact_log, concat_logs
+from catalogue import Catalogue
 
 # --- Configuration ---
 REPO_NAME = "badinlee/sister-fitness"  # <--- UPDATE THIS
 DATA_FILE = "data.csv"
 PROFILE_FILE = "profiles.csv"
 MENU_FILE = "my_menu.csv"
+CATALOGUE_FILE = os.environ.get("SISFIT_CATALOGUE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalogue.sqlite3")  # python catalogue.py build products.csv
+BRAND_PROMPT_VERSION = 1  # Bump when the brand prompt/parsing changes; old cached answers are then ignored
 
 # --- 1. EXPANDED OFFLINE DATABASE (Works without AI) ---
 LOCAL_NZ_DB = {
@@ -73,58 +88,140 @@ BASE_MENU = [
 ]
 
 # --- Setup Google AI ---
-if "GOOGLE_API_KEY" in st.secrets:
-    genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
+# Imported and configured once per process, the first time a model is needed
+@st.cache_resource
+def get_genai():
+    with span("import.genai"):
+        import google.generativeai as genai
+    if "GOOGLE_API_KEY" in st.secrets:
+        genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
+    return genai
+
+@st.cache_resource
+def get_model(name):
+    return get_genai().GenerativeModel(name)
 
 # --- GitHub Functions ---
-def get_repo():
-    g = Github(st.secrets["GITHUB_TOKEN"])
-    return g.get_repo(REPO_NAME)
+@st.cache_resource
+def get_store():
+    # Set SISFIT_LOCAL_DIR to run against a local folder instead of GitHub
+    local_dir = os.environ.get("SISFIT_LOCAL_DIR")
+    mirror = ColumnarMirror() if ColumnarMirror.available() else None
+    if local_dir:
+        return CsvStore(LocalBackend(local_dir), mirror=mirror)
+    return CsvStore(GitHubBackend(st.secrets["GITHUB_TOKEN"], REPO_NAME), mirror=mirror)
+
+def storage_unavailable(e):
+    # A rate limit or outage is not "no data": stop rather than render an
+    # empty app (no profile, no history) on top of it
+    st.error(f"⚠️ Can't reach the data repo right now ({e}). Nothing was lost, try again in a minute.")
+    st.stop()
 
+@traced("load.csv")
 def load_csv(filename):
     try:
-        repo = get_repo()
-        contents = repo.get_contents(filename)
-        df = pd.read_csv(io.StringIO(contents.decoded_content.decode()))
-        return df
-    except:
+        return get_store().read_frame(filename)
+    except FileNotFoundError:
         return pd.DataFrame()
+    except Exception as e:
+        storage_unavailable(e)
 
+@traced("save.csv")
 def save_csv(df, filename, message):
-    repo = get_repo()
-    csv_content = df.to_csv(index=False)
+    get_store().write_frame(df, filename, message)
+
+@st.cache_resource
+def get_log():
+    # data/<user>/<YYYY-MM>.csv once migrated (python partitions.py), else DATA_FILE
+    return PartitionedLog(get_store(), legacy_path=DATA_FILE)
+
+@st.cache_resource
+def get_journal():
+    return WriteBehindJournal(get_log())
+
+@st.cache_resource
+def get_trends():
+    return TrendsEngine(max_points=400)
+
+@st.cache_resource
+def get_daily_index():
+    return DailyIndex()
+
+@st.cache_resource
+def get_tracer():
+    # One JSON line per rerun in SISFIT_TRACE_FILE (default: temp dir); summarise with python tracing.py
+    return Tracer()
+
+def log_entry(entry, message):
+    # Queued locally and committed in the background with any other new rows
+    entry = {**entry, "id": new_row_id()}
+    get_journal().append(entry, message)
+    get_daily_index().add([entry])
+
+def data_version(user):
+    return (get_log().version(), len(get_journal().pending_rows(user)))
+
+def recent_months(user):
     try:
-        contents = repo.get_contents(filename)
-        repo.update_file(contents.path, message, csv_content, contents.sha)
-    except:
-        repo.create_file(filename, message, csv_content)
+        return get_log().recent_months(user)
+    except Exception as e:
+        storage_unavailable(e)
+
+@traced("load.log")
+def load_log(user, months=None):
+    # months=None is the whole history; otherwise only those monthly shards
+    try:
+        df = get_log().read(user, months=months)
+    except FileNotFoundError:
+        df = pd.DataFrame()
+    except Exception as e:
+        storage_unavailable(e)
+    pending = get_journal().pending_rows(user)
+    if pending and months is not None:
+        pending = [row for row, month in zip(pending, month_keys([row["date"] for row in pending])) if month in months]
+    if pending:
+        df = concat_logs([df, compact_log(add_date_columns(pd.DataFrame(pending)))])
+    return df
 
 # --- HYBRID SEARCH ENGINE ---
+@st.cache_resource
+def get_model_router():
+    # Flash first; Pro is started too if Flash hasn't answered in 3s or fails
+    def backend(name):
+        model = get_model(name)
+        return lambda prompt: model.generate_content(prompt, request_options={"timeout": 20}).text
+    return ModelRouter([("gemini-1.5-flash", backend("gemini-1.5-flash")), ("gemini-pro", backend("gemini-pro"))], hedge_after=3.0, deadline=20.0)
+
+@traced("model.generate")
 def get_ai_response(prompt):
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
-        return response.text
+        return get_model_router().generate(prompt)
     except:
-        try:
-            model = genai.GenerativeModel('gemini-pro')
-            response = model.generate_content(prompt)
-            return response.text
-        except:
-            return "Error"
+        return "Error"
 
-def search_brands_hybrid(query):
-    query_lower = query.lower()
-    results = []
+@st.cache_resource
+def get_food_index(menu):
+    return FoodIndex.build(LOCAL_NZ_DB, menu)
 
-    # 1. Check Local DB
-    for key in LOCAL_NZ_DB:
-        if key in query_lower:
-            results.extend(LOCAL_NZ_DB[key])
-    
-    if results: return results
+@st.cache_resource(max_entries=1)
+def get_catalogue(mtime):
+    # Memory-mapped SQLite file, queried per search; None if it hasn't been
+    # built. Keyed on the file's mtime, so running `catalogue.py build` later
+    # is picked up without a restart.
+    return Catalogue.open(CATALOGUE_FILE)
+
+def catalogue_mtime():
+    try:
+        return os.path.getmtime(CATALOGUE_FILE)
+    except OSError:
+        return None
+
+@st.cache_resource
+def get_ai_cache():
+    return AICache()
 
-    # 2. Ask AI (Backup)
+def ask_ai_for_brands(query):
+    results = []
     prompt = (
         f"The user is searching for '{query}' in New Zealand. "
         "Identify 3-4 common brands. "
@@ -147,24 +244,53 @@ def search_brands_hybrid(query):
                     })
     return results
 
+@traced("search.brands")
+def search_brands_hybrid(query):
+    # 1. Check Local DB + menu (tokenised, typo-tolerant, ranked), then the product catalogue
+    results = get_food_index(full_menu).search(query)
+    catalogue = get_catalogue(catalogue_mtime())
+    if catalogue is not None and len(results) < 8:
+        with span("search.catalogue"):
+            seen = {r["name"] for r in results}
+            results += [r for r in catalogue.search(query) if r["name"] not in seen][:8 - len(results)]
+    
+    if results: return results
+
+    # 2. Ask AI (Backup) - cached on disk per normalised query; empty answers are not kept
+    key = AICache.make_key("brands", BRAND_PROMPT_VERSION, query)
+    return get_ai_cache().get_or_compute(key, lambda: ask_ai_for_brands(query))
+
+@traced("model.vision")
 def analyze_image_for_search(image):
     try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        res = model.generate_content(["Identify this food item name only.", image])
+        res = get_model('gemini-1.5-flash').generate_content(["Identify this food item name only.", image])
         return res.text.strip()
     except:
         return "Unknown Food"
 
+@st.cache_resource
+def get_scanner():
+    # Frames go up as a ~512px JPEG; rescans of the same item are served from the cache
+    from image_scan import ImageScanner  # pulls in PIL
+    identify = lambda jpeg: analyze_image_for_search({"mime_type": "image/jpeg", "data": jpeg})
+    return ImageScanner(identify, search_brands_hybrid, get_ai_cache())
+
 # --- App Layout ---
 st.set_page_config(page_title="SisFit", page_icon="🦋", layout="centered", initial_sidebar_state="collapsed")
+trace_session = st.session_state.setdefault("trace_session", new_row_id())
+trace_root = get_tracer().begin(trace_session, start=script_start)
 
 # Header
 c1, c2 = st.columns([3, 1])
 with c1: st.title("🦋 SisFit")
 with c2: user = st.selectbox("User", ["Me", "Sister"], label_visibility="collapsed")
+trace_root.attrs["user"] = user
 
 # Load Data
-df_data = load_csv(DATA_FILE)
+# Just the recent months: hero stats, the weekly bank and the diary's default
+# day. Trends and older diary days load what they need when they're shown.
+recent = recent_months(user)
+df_data = load_log(user, recent)
 df_profiles = load_csv(PROFILE_FILE)
 df_menu = load_csv(MENU_FILE)
 full_menu = BASE_MENU.copy()
@@ -172,12 +298,36 @@ if not df_menu.empty:
     for index, row in df_menu.iterrows():
         full_menu.append(row.to_dict())
 
-# Repair
-if not df_data.empty:
-    for col in ["meal_type", "notes"]:
-        if col not in df_data.columns: df_data[col] = ""
-    if "calories" not in df_data.columns: df_data["calories"] = 0
-    if "weight" not in df_data.columns: df_data["weight"] = 0.0
+# Missing columns are repaired and dtypes compacted at load (see schema.compact_log)
+
+with st.sidebar:
+    # Entries are acknowledged before they are committed; if the background
+    # flush keeps failing they only exist in this process, so say so
+    journal = get_journal()
+    if journal.last_error is not None:
+        unsaved = len(journal.pending_rows())
+        st.warning(f"⚠️ {unsaved} {'entry' if unsaved == 1 else 'entries'} not saved to GitHub yet, retrying. Last error: {journal.last_error}")
+        if st.button("Retry now", use_container_width=True):
+            try:
+                journal.flush()
+                st.rerun()
+            except Exception as e:
+                st.error(f"Still failing: {e}")
+    ai_stats = get_ai_cache().stats()
+    st.caption(f"🤖 AI cache: {ai_stats['hits'] + ai_stats['coalesced']} saved / {ai_stats['misses']} model calls ({ai_stats['hit_rate']:.0%})")
+    with st.expander("📥 Import history"):
+        # Large exports: python importer.py export.csv --user Me
+        upload = st.file_uploader("CSV or JSON export", type=["csv", "jsonl", "ndjson", "json"])
+        in_lbs = st.checkbox("Weights are in lbs")
+        if upload and st.button("Import", use_container_width=True):
+            bar = st.progress(0.0, text="Importing...")
+            try:
+                get_journal().flush()
+                report = import_log(get_log(), upload, user=user, lbs=in_lbs, message=f"Import {upload.name}",
+                                    progress=lambda n, rate: bar.progress(min(n / max(upload.size / 40, 1), 1.0), text=f"{n:,} rows ({rate:,.0f}/s)"))
+                st.success(str(report))
+            except Exception as e:
+                st.error(f"Import failed: {e}")
 
 # Profile Check
 user_profile_data = df_profiles[df_profiles["user"] == user] if not df_profiles.empty else pd.DataFrame()
@@ -194,14 +344,13 @@ else:
     latest_weight = user_profile["start_weight"]
     
     user_history = df_data[df_data["user"] == user].copy() if not df_data.empty else pd.DataFrame()
+    daily = get_daily_index()
     if not user_history.empty:
-        user_history["dt"] = pd.to_datetime(user_history["date"])
-        user_history["nice_date"] = user_history["dt"].dt.strftime("%a %d %b")
-        user_history["iso_date"] = user_history["dt"].dt.strftime("%Y-%m-%d")
-        
-        todays_logs = user_history[user_history["iso_date"] == today_str_iso]
-        calories_today = todays_logs["calories"].sum()
-        latest_weight = user_history.iloc[-1]['weight']
+        # dt / iso_date come pre-parsed from the store (see add_date_columns)
+        with span("aggregate.daily_index"):
+            daily.sync(user, user_history, (data_version(user), sorted(recent or [])))
+        calories_today = daily.calories(user, today_str_iso)
+        latest_weight = daily.latest_weight(user, latest_weight)
     
     goal = int(user_profile["calorie_target"])
     
@@ -212,9 +361,11 @@ else:
     rem_today = goal - int(calories_today)
     m2.metric("Left", rem_today, delta_color="normal" if rem_today > 0 else "inverse")
     m3.metric("Kg", f"{latest_weight}")
+    get_tracer().rendered(trace_root)
     
     # Tabs
-    t_add, t_diary, t_trends, t_shop = st.tabs(["➕ Log Food", "📅 Diary", "📊 Trends", "🛒 List"])
+    # Tracked, so the Trends charts (and plotly) are only built while their tab is open
+    t_add, t_diary, t_trends, t_shop = st.tabs(["➕ Log Food", "📅 Diary", "📊 Trends", "🛒 List"], key="tab", on_change="rerun")
 
     # --- TAB 1: LOGGING ---
     with t_add:
@@ -229,10 +380,8 @@ else:
                             "user": user, "weight": latest_weight, 
                             "calories": item['cals'], "notes": item['desc'], "meal_type": item['type']
                         }
-                        updated_data = pd.concat([df_data, pd.DataFrame([new_entry])], ignore_index=True)
-                        save_csv(updated_data, DATA_FILE, "Quick Add")
+                        log_entry(new_entry, "Quick Add")
                         st.toast(f"✅ Added {item['name']}!")
-                        time_lib.sleep(0.5)
                         st.rerun()
 
         st.divider()
@@ -270,11 +419,11 @@ else:
                 cam_pic = st.camera_input("Scan", label_visibility="collapsed")
                 if cam_pic:
                     with st.spinner("Identifying..."):
+                        from PIL import Image
                         img = Image.open(cam_pic)
-                        detected = analyze_image_for_search(img)
+                        # Identify + Auto Search (skipped entirely on a cached rescan)
+                        detected, results = get_scanner().scan(img)
                         st.session_state['show_camera'] = False
-                        # Auto Search
-                        results = search_brands_hybrid(detected)
                         st.session_state['brand_results'] = results
                         st.rerun()
 
@@ -321,13 +470,11 @@ else:
                         "user": user, "weight": latest_weight, 
                         "calories": final_cals, "notes": desc, "meal_type": m_type
                     }
-                    updated_data = pd.concat([df_data, pd.DataFrame([new_entry])], ignore_index=True)
-                    save_csv(updated_data, DATA_FILE, "Brand Add")
+                    log_entry(new_entry, "Brand Add")
                     
                     st.toast("Saved!")
                     st.session_state['brand_results'] = []
                     st.session_state['selected_brand'] = None
-                    time_lib.sleep(0.5)
                     st.rerun()
 
     # --- TAB 2: CLEAN DIARY ---
@@ -346,11 +493,21 @@ else:
         sel_date_iso = new_date.strftime("%Y-%m-%d")
         sel_display = new_date.strftime("%A %d %B")
         
+        in_window = recent is None or sel_date_iso[:7] in recent
+        if in_window:
+            day_data = user_history[user_history["iso_date"] == sel_date_iso] if not user_history.empty else user_history
+        else:
+            # Older than what was loaded up front: fetch just that month
+            month_history = load_log(user, {sel_date_iso[:7]})
+            day_data = month_history[month_history["iso_date"] == sel_date_iso] if not month_history.empty else month_history
+        
         if not user_history.empty:
-            day_data = user_history[user_history["iso_date"] == sel_date_iso]
             with st.container(border=True):
                 st.markdown(f"### {sel_display}")
-                d_total = day_data["calories"].sum() if not day_data.empty else 0
+                if in_window:
+                    d_total = daily.calories(user, sel_date_iso)
+                else:
+                    d_total = float(pd.to_numeric(day_data["calories"], errors="coerce").sum()) if not day_data.empty else 0.0
                 d_rem = goal - d_total
                 md1, md2 = st.columns(2)
                 md1.metric("Used", int(d_total))
@@ -360,33 +517,39 @@ else:
             st.divider()
             if not day_data.empty:
                 st.info("💡 Edit numbers below and click Update")
+                # Plain text in the editor: a categorical column rejects new food names
+                # The row id rides along as a hidden column; added rows come back with none
+                day_rows = day_data[["id", "meal_type", "notes", "calories"]].reset_index(drop=True).astype({"meal_type": object, "notes": object})
                 edited_day = st.data_editor(
-                    day_data[["meal_type", "notes", "calories"]],
+                    day_rows,
                     column_config={
+                        "id": None,
                         "meal_type": st.column_config.SelectboxColumn("Meal", options=["Breakfast", "Lunch", "Dinner", "Snack"], width="small"),
                         "notes": st.column_config.TextColumn("Food", width="large"),
                         "calories": st.column_config.NumberColumn("Cals", width="small")
                     },
-                    use_container_width=True, num_rows="dynamic", key="day_editor"
+                    use_container_width=True, hide_index=True, num_rows="dynamic", key="day_editor"
                 )
                 if st.button(f"🔄 Update Diary", type="primary"):
-                    full_df = load_csv(DATA_FILE)
-                    full_df["temp_dt"] = pd.to_datetime(full_df["date"])
-                    full_df["temp_iso"] = full_df["temp_dt"].dt.strftime("%Y-%m-%d")
-                    keep_mask = ~((full_df["user"] == user) & (full_df["temp_iso"] == sel_date_iso))
-                    data_to_keep = full_df[keep_mask].drop(columns=["temp_dt", "temp_iso"])
-                    
-                    base_ts = day_data.iloc[0]["date"]
-                    base_w = day_data.iloc[0]["weight"]
-                    new_rows = []
-                    for idx, row in edited_day.iterrows():
-                        new_rows.append({"date": base_ts, "user": user, "weight": base_w, "calories": row["calories"], "notes": row["notes"], "meal_type": row["meal_type"]})
-                    
-                    final_df = pd.concat([data_to_keep, pd.DataFrame(new_rows)], ignore_index=True)
-                    save_csv(final_df, DATA_FILE, f"Updated {sel_date_iso}")
-                    st.toast("✅ Updated!")
-                    time_lib.sleep(1)
-                    st.rerun()
+                    try:
+                        get_journal().flush()
+                        # Only the rows touched in the editor are sent; new rows take
+                        # the day's first timestamp and weight as before
+                        diff = diff_rows(day_rows, edited_day, ["meal_type", "notes", "calories"])
+                        if diff:
+                            defaults = {"date": day_data.iloc[0]["date"], "user": user, "weight": day_data.iloc[0]["weight"]}
+                            # modify() re-reads the shard at commit time and retries on a
+                            # concurrent write, so the diff is rebased rather than lost
+                            with span("diary.save", changes=len(diff.inserts) + len(diff.updates) + len(diff.deletes)):
+                                get_log().modify(user, sel_date_iso[:7], lambda shard: apply_diff(shard, diff, defaults), f"Updated {sel_date_iso}")
+                            if in_window:
+                                daily.replace_day(user, sel_date_iso, apply_diff(day_data, diff, defaults).to_dict("records"))
+                            st.toast("✅ Updated!")
+                    except Exception as e:
+                        # The edits stay in the editor, so they can be saved again
+                        st.error(f"Update failed: {e}")
+                    else:
+                        st.rerun()
             else:
                 st.write("No meals logged.")
         else:
@@ -405,21 +568,34 @@ else:
                         "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
                         "user": user, "weight": new_w, "calories": 0, "notes": "Weight Check", "meal_type": "Snack"
                     }
-                     updated_data = pd.concat([df_data, pd.DataFrame([new_entry])], ignore_index=True)
-                     save_csv(updated_data, DATA_FILE, "Weight Update")
+                     log_entry(new_entry, "Weight Update")
                      st.toast("Weight Updated!")
-                     time_lib.sleep(1)
                      st.rerun()
 
         if not user_history.empty:
-            # 2. Graph
-            fig = px.line(user_history, x="dt", y="weight", markers=True, title="Weight Progress")
-            st.plotly_chart(fig, use_container_width=True)
+            # 2. Graph (one point per day/week/month, capped at 400 points)
+            period = st.radio("Period", list(FREQUENCIES), horizontal=True, label_visibility="collapsed")
+            if t_trends.open:
+                # The charts span every month, so only this tab reads the whole
+                # history, and only when the chart cache misses
+                with span("aggregate.trends", period=period):
+                    weight_df, cal_df = get_trends().charts(
+                        user, data_version(user), lambda: user_history if recent is None else load_log(user), FREQUENCIES[period]
+                    )
+                with span("charts.build"):
+                    with span("import.plotly"):
+                        import plotly.express as px
+                    fig = px.line(weight_df, x="date", y="weight", markers=len(weight_df) < 60, title="Weight Progress")
+                    cal_cols = ["calories", "cal_7d", "cal_30d"] if period == "Daily" else ["cal_7d", "cal_30d"]  # rolling daily averages
+                    fig_cal = px.line(cal_df, x="date", y=cal_cols, title="Calories")
+                with span("charts.render"):
+                    st.plotly_chart(fig, use_container_width=True)
+                    st.plotly_chart(fig_cal, use_container_width=True)
             
             # 3. Weekly Bank
             st.subheader("💰 Weekly Calorie Bank")
-            last_7_days = user_history[user_history["dt"] >= (datetime.now() - timedelta(days=7))]
-            total_used = last_7_days["calories"].sum()
+            week_start = (today_obj - timedelta(days=6)).strftime("%Y-%m-%d")
+            total_used = daily.calories_between(user, week_start, today_str_iso)
             total_allowance = goal * 7
             balance = total_allowance - total_used
             
@@ -435,3 +611,31 @@ else:
             with st.expander(cat):
                 for i in items:
                     st.checkbox(i, key=i)
+
+# --- Debug: per-rerun timings ---
+with st.sidebar:
+    if st.toggle("🐞 Timings", key="debug_timings"):
+        totals = trace_root.totals()
+        if "first_render_ms" in trace_root.attrs:
+            cold = f" · cold worker, process up {trace_root.attrs['process_ms'] / 1000:.1f} s" if "process_ms" in trace_root.attrs else ""
+            st.caption(f"First render: {trace_root.attrs['first_render_ms']:.0f} ms{cold}")
+        if not df_data.empty:
+            st.caption(f"Log frame: {len(df_data):,} rows, {df_data.memory_usage(deep=True).sum() / 2**20:.1f} MB")
+        st.caption(
+            f"This run: {trace_root.ms:.0f} ms · {totals.get('bytes_in', 0) / 1024:.0f} KiB in · "
+            f"{totals.get('bytes_out', 0) / 1024:.0f} KiB out · {totals.get('github_calls', 0)} GitHub calls · "
+            f"{totals.get('model_calls', 0)} model calls"
+        )
+        spans = trace_root.flatten()[1:]
+        if spans:
+            st.dataframe(pd.DataFrame([
+                {"span": "· " * (s["depth"] - 1) + s["name"], "ms": s["ms"], "info": s.get("attrs", {}).get("source") or s.get("attrs", {}).get("path", "")}
+                for s in spans
+            ]), hide_index=True, use_container_width=True)
+        span_stats = get_tracer().percentiles()
+        if span_stats:
+            st.caption("Last reruns (p50 / p95 ms)")
+            st.dataframe(pd.DataFrame(
+                [{"span": name, "n": n, "p50": round(p50, 1), "p95": round(p95, 1)} for name, (n, p50, p95) in span_stats.items()]
+            ).sort_values("p95", ascending=False), hide_index=True, use_container_width=True)
+get_tracer().end(trace_session)
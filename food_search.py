@@ -0,0 +1,194 @@
+import heapq
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    tokens = []
+    for tok in _TOKEN.findall(str(text).lower().replace("'", "")):
+        # Crude plural folding so "eggs" finds "egg" and "farrahs" finds "farrah"
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def within_one_edit(a, b):
+    # Single insert / delete / substitute / adjacent swap ("mlk" ~ "milk")
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        if a[i + 1:] == b[i + 1:]:
+            return True
+        return a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:]
+    return a[i:] == b[i + 1:]
+
+
+# --- Scoring ---
+# Shared by FoodIndex (in memory) and catalogue.Catalogue (SQLite), which only
+# differ in how they look up candidate tokens and postings.
+NAME_WEIGHT, EXTRA_WEIGHT = 1.0, 0.6  # item name words vs brand keys / descriptions
+EXACT, PREFIX, FUZZY = 1.0, 0.8, 0.7
+
+
+def match_token(qtok, prefixed, overlaps, min_similarity):
+    # token -> match strength for one query token. prefixed: vocabulary
+    # tokens starting with qtok (qtok itself included, if known);
+    # overlaps(qgrams): (token, its trigram count, trigrams shared) rows
+    found = {tok: EXACT if tok == qtok else PREFIX for tok in prefixed}
+    if len(qtok) >= 3:
+        qgrams = trigrams(qtok)
+        for tok, gram_count, shared in overlaps(qgrams):
+            sim = 2 * shared / (len(qgrams) + gram_count)
+            if sim < min_similarity and within_one_edit(qtok, tok):
+                sim = min_similarity
+            if sim >= min_similarity and sim * FUZZY > found.get(tok, 0):
+                found[tok] = sim * FUZZY
+    return found
+
+
+def rank(qtokens, matches, postings, name_len, limit):
+    # Item ids, best first. Every query token must match something in an
+    # item; its score is the sum of each token's best match x field weight.
+    # matches(qtok) -> {token: strength}; postings(tokens) -> {token: {item: weight}}
+    if not qtokens:
+        return []
+    scores = None
+    for qtok in qtokens:
+        found = matches(qtok)
+        if not found:
+            return []
+        best = defaultdict(float)
+        lists = postings(found)
+        for tok, strength in found.items():
+            for item, weight in lists.get(tok, {}).items():
+                if strength * weight > best[item]:
+                    best[item] = strength * weight
+        if scores is None:
+            scores = dict(best)
+        else:
+            scores = {i: s + best[i] for i, s in scores.items() if i in best}
+        if not scores:
+            return []
+    # Shorter names win ties: "Anchor Blue Milk" before a long variant
+    return [i for i, _ in heapq.nsmallest(limit, scores.items(), key=lambda kv: (-kv[1], name_len(kv[0])))]
+
+
+# --- Food Search Index ---
+# Inverted index over item tokens. Each query token is matched exactly, by
+# prefix, or by trigram similarity (typos), and an item only ranks if every
+# query token matched something in it, so "anchor milk" no longer returns
+# Anchor butter.
+class FoodIndex:
+    def __init__(self, min_similarity=0.5):
+        self.min_similarity = min_similarity
+        self.items = []
+        self._postings = defaultdict(dict)  # token -> {item id: field weight}
+        self._grams = defaultdict(set)      # trigram -> tokens
+        self._gram_counts = {}
+        self._vocab = []
+
+    @classmethod
+    def build(cls, local_db, menu=()):
+        index = cls()
+        for key, items in local_db.items():
+            for item in items:
+                index.add(item, extra=key)
+        for item in menu:
+            try:
+                cals = int(item["cals"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            desc = item.get("desc")
+            index.add({"name": str(item["name"]), "unit": "1 Serve", "cals": cals, "calc": "item"}, extra=desc if isinstance(desc, str) else "")
+        index.finish()
+        return index
+
+    def add(self, item, extra=""):
+        # Words in the item name count fully; brand keys / menu descriptions less
+        item_id = len(self.items)
+        self.items.append(item)
+        for tok in tokenize(extra):
+            self._postings[tok][item_id] = EXTRA_WEIGHT
+        for tok in tokenize(item["name"]):
+            self._postings[tok][item_id] = NAME_WEIGHT
+
+    def finish(self):
+        self._vocab = sorted(self._postings)
+        self._grams.clear()
+        for tok in self._vocab:
+            grams = trigrams(tok)
+            self._gram_counts[tok] = len(grams)
+            for gram in grams:
+                self._grams[gram].add(tok)
+
+    def _prefixed(self, qtok):
+        i = bisect_left(self._vocab, qtok)
+        while i < len(self._vocab) and self._vocab[i].startswith(qtok):
+            yield self._vocab[i]
+            i += 1
+
+    def _overlaps(self, qgrams):
+        overlap = defaultdict(int)
+        for gram in qgrams:
+            for tok in self._grams.get(gram, ()):
+                overlap[tok] += 1
+        return ((tok, self._gram_counts[tok], shared) for tok, shared in overlap.items())
+
+    def _matches(self, qtok):
+        return match_token(qtok, self._prefixed(qtok), self._overlaps, self.min_similarity)
+
+    def search(self, query, limit=8):
+        ids = rank(tokenize(query), self._matches, lambda tokens: self._postings, lambda i: len(self.items[i]["name"]), limit)
+        return [self.items[i] for i in ids]
+
+
+# --- Benchmark ---
+def _synthetic_catalogue(n, seed=7):
+    import random
+    rng = random.Random(seed)
+    brands = ["anchor", "watties", "farrah", "vogel", "rebel", "pams", "sanitarium", "tip top", "mainland", "lewis road", "ceres", "kapiti"]
+    foods = ["milk", "yoghurt", "butter", "cheese", "bread", "wrap", "beans", "spaghetti", "oats", "muesli", "rice", "pasta", "chicken", "ice cream", "crackers", "peanut butter", "soup", "juice"]
+    styles = ["lite", "trim", "original", "protein", "organic", "wholegrain", "low carb", "vanilla", "greek", "smoked"]
+    db = defaultdict(list)
+    for i in range(n):
+        brand = rng.choice(brands)
+        name = f"{brand.title()} {rng.choice(styles).title()} {rng.choice(foods).title()} {i}"
+        db[brand].append({"name": name, "unit": "100g", "cals": rng.randint(20, 600), "calc": "gram"})
+    return dict(db)
+
+
+def benchmark(n=20000, queries=("milk", "anchor milk", "anchr mlk", "yogurt", "greek yoghurt", "peanut", "wholegrain bread", "lewis road ice cream")):
+    db = _synthetic_catalogue(n)
+    t0 = time.perf_counter()
+    index = FoodIndex.build(db)
+    build_s = time.perf_counter() - t0
+    print(f"Built index over {len(index.items)} items in {build_s * 1000:.1f} ms ({len(index._vocab)} tokens)")
+    for q in queries:
+        reps = 20
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            hits = index.search(q)
+        per_query = (time.perf_counter() - t0) / reps
+        print(f"{q!r:28} {per_query * 1e6:9.0f} us  {len(hits)} hits  top={hits[0]['name'] if hits else '-'}")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the local food search index")
+    parser.add_argument("--items", type=int, default=20000)
+    benchmark(parser.parse_args().items)
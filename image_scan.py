@@ -0,0 +1,138 @@
+import io
+import time
+
+from PIL import Image
+
+SCAN_VERSION = 1
+
+
+def prepare_image(image, max_side=512, quality=80):
+    # Gemini only needs a few hundred pixels to name a food; a phone frame is
+    # several megapixels. Returns the JPEG bytes and the image decoded from them.
+    img = image.convert("RGB")
+    img.thumbnail((max_side, max_side), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality, optimize=True)
+    data = buf.getvalue()
+    return data, Image.open(io.BytesIO(data))
+
+
+def dhash(image, size=8):
+    # Difference hash: robust to rescaling, recompression and small shifts
+    small = image.convert("L").resize((size + 1, size), Image.LANCZOS)
+    px = small.tobytes()
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = px[row * (size + 1) + col]
+            right = px[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:0{size * size // 4}x}"
+
+
+def hamming(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+# --- Scan Pipeline ---
+# shrink -> hash -> (cache hit: done) or identify(jpeg bytes) + search -> cache.
+# A rescan of the same pot of yoghurt is a near-identical hash, so anything
+# within max_distance bits reuses the earlier label and brand results.
+class ImageScanner:
+    def __init__(self, identify, search, cache, max_side=512, quality=80, max_distance=6):
+        self.identify = identify
+        self.search = search
+        self.cache = cache
+        self.max_side = max_side
+        self.quality = quality
+        self.max_distance = max_distance
+        self.scans = self.hits = self.bytes_sent = 0
+        self.latencies = []
+        self._hashes = [k.rsplit(":", 1)[1] for k in cache.keys(f"scan:v{SCAN_VERSION}:")]
+
+    def _lookup(self, h):
+        best = min(self._hashes, key=lambda known: hamming(h, known), default=None)
+        if best is None or hamming(h, best) > self.max_distance:
+            return None
+        return self.cache.get(f"scan:v{SCAN_VERSION}:{best}")
+
+    def scan(self, image):
+        t0 = time.perf_counter()
+        self.scans += 1
+        data, small = prepare_image(image, self.max_side, self.quality)
+        h = dhash(small)
+        cached = self._lookup(h)
+        if cached is not None:
+            self.hits += 1
+            label, results = cached["label"], cached["results"]
+        else:
+            self.bytes_sent += len(data)
+            label = self.identify(data)
+            results = self.search(label) if label and label != "Unknown Food" else []
+            if results:
+                self.cache.put(f"scan:v{SCAN_VERSION}:{h}", {"label": label, "results": results})
+                self._hashes.append(h)
+        self.latencies.append(time.perf_counter() - t0)
+        return label, results
+
+    def stats(self):
+        lat = sorted(self.latencies)
+        return {
+            "scans": self.scans,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.scans if self.scans else 0.0,
+            "bytes_sent": self.bytes_sent,
+            "p50_ms": lat[len(lat) // 2] * 1000 if lat else 0.0,
+        }
+
+
+# --- Benchmark with a stub model ---
+def _fake_photo(seed, size=(3024, 4032)):
+    import random
+    rng = random.Random(seed)
+    img = Image.new("RGB", (64, 48), tuple(rng.randrange(256) for _ in range(3)))
+    for _ in range(40):
+        x, y = rng.randrange(64), rng.randrange(48)
+        img.paste(tuple(rng.randrange(256) for _ in range(3)), (x, y, x + rng.randrange(4, 20), y + rng.randrange(4, 20)))
+    return img.resize(size, Image.BICUBIC)
+
+
+def benchmark(items=5, rescans=3, bytes_per_second=2_000_000, model_latency=0.4):
+    import random
+    import tempfile
+    from ai_cache import AICache
+
+    uploads = []
+
+    def stub_identify(data):
+        uploads.append(len(data))
+        time.sleep(model_latency + len(data) / bytes_per_second)
+        return f"food {len(uploads)}"
+
+    def stub_search(label):
+        time.sleep(model_latency)
+        return [{"name": label, "unit": "100g", "cals": 100, "calc": "gram"}]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        photos = [_fake_photo(i) for i in range(items)]
+        raw = []
+        for photo in photos:
+            buf = io.BytesIO()
+            photo.save(buf, format="JPEG", quality=95)
+            raw.append(buf.tell())
+        print(f"Full-frame JPEG: {sum(raw) / len(raw) / 1024:.0f} KiB avg, est. {model_latency * 2 + sum(raw) / len(raw) / bytes_per_second:.2f} s per uncached scan")
+        for max_side in (1024, 512, 384):
+            uploads.clear()
+            scanner = ImageScanner(stub_identify, stub_search, AICache(f"{tmp}/scan{max_side}.sqlite3"), max_side=max_side)
+            rng = random.Random(1)
+            for _ in range(rescans):
+                for photo in photos:
+                    # Each rescan is a slightly different frame of the same item
+                    jitter = photo.rotate(rng.uniform(-2, 2), resample=Image.BILINEAR)
+                    scanner.scan(jitter)
+            s = scanner.stats()
+            print(f"max_side={max_side:4}: upload {sum(uploads) / max(len(uploads), 1) / 1024:6.0f} KiB, hit rate {s['hit_rate']:.0%}, p50 {s['p50_ms']:.0f} ms, model calls {len(uploads) * 2}")
+
+
+if __name__ == "__main__":
+    benchmark()
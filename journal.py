@@ -0,0 +1,79 @@
+import atexit
+import threading
+from collections import Counter
+
+import pandas as pd
+
+
+# --- Write-Behind Journal ---
+# Rows are acknowledged as soon as they are queued in memory. A background
+# timer folds everything queued within the debounce window (or as soon as
+# max_pending rows pile up) into one append + one commit.
+class WriteBehindJournal:
+    def __init__(self, log, debounce=5.0, max_pending=10):
+        self.log = log
+        self.debounce = debounce
+        self.max_pending = max_pending
+        self.last_error = None
+        self._pending = []  # (row, message)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+        atexit.register(self.flush)
+
+    def append(self, row, message="Log"):
+        with self._lock:
+            self._pending.append((dict(row), message))
+            due = len(self._pending) >= self.max_pending
+        if due:
+            self._schedule(0)
+        else:
+            self._schedule(self.debounce)
+
+    def pending_rows(self, user=None):
+        with self._lock:
+            return [row for row, _ in self._pending if user is None or row.get("user") == user]
+
+    def _schedule(self, delay):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            pass  # recorded in last_error, retry already scheduled
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending)
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if not batch:
+                return 0
+            new_rows = pd.DataFrame([row for row, _ in batch])
+            try:
+                self.log.append(new_rows, _commit_message(batch))
+            except Exception as e:
+                # The timer was cancelled above, so a failed flush (background
+                # or foreground) must queue its own retry
+                self.last_error = e
+                self._schedule(self.debounce * 2)
+                raise
+            with self._lock:
+                # Rows queued while we were committing stay pending
+                del self._pending[:len(batch)]
+            self.last_error = None
+            return len(batch)
+
+
+def _commit_message(batch):
+    counts = Counter(message for _, message in batch)
+    summary = ", ".join(f"{m} x{n}" if n > 1 else m for m, n in counts.items())
+    return f"Log {len(batch)} entries ({summary})"
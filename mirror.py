@@ -0,0 +1,54 @@
+import glob
+import os
+import tempfile
+from urllib.parse import quote
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # The mirror is an optimisation; CSV still works without it
+    feather = None
+
+
+# --- Columnar Local Mirror ---
+# One uncompressed Arrow IPC (Feather v2) file per (path, blob SHA). Reading it
+# back is a memory map rather than CSV + datetime parsing, and a new SHA simply
+# means a new file, so the mirror can never serve a stale copy.
+class ColumnarMirror:
+    def __init__(self, root=None):
+        self.root = root or os.environ.get("SISFIT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "sisfit-mirror")
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def available():
+        return feather is not None
+
+    def _prefix(self, path):
+        return os.path.join(self.root, quote(path, safe=""))
+
+    def _file(self, path, sha):
+        return f"{self._prefix(path)}.{sha}.arrow"
+
+    def load(self, path, sha):
+        try:
+            table = feather.read_table(self._file(path, sha), memory_map=True)
+        except (FileNotFoundError, OSError):
+            return None
+        return table.to_pandas()
+
+    def save(self, path, sha, df):
+        target = self._file(path, sha)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        try:
+            feather.write_feather(df.reset_index(drop=True), tmp, compression="uncompressed")
+            os.replace(tmp, target)
+        except Exception:
+            # Unwritable cache dir or a column Arrow can't type: skip mirroring
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        for old in glob.glob(glob.escape(self._prefix(path)) + ".*.arrow"):
+            if old != target:
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,167 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from tracing import count
+
+
+class ModelUnavailable(Exception):
+    pass
+
+
+# --- Circuit Breaker ---
+# Opens after `failures` consecutive errors; after `cooldown` seconds one trial
+# call is let through (half-open) and its outcome closes or re-opens it.
+class CircuitBreaker:
+    def __init__(self, failures=3, cooldown=60.0, clock=time.monotonic):
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if self._clock() - self._opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def release(self):
+        # An allowed call that never ran (cancelled before it started) gives
+        # its half-open trial back instead of holding it forever
+        with self._lock:
+            self._trial = False
+
+    def record(self, ok):
+        with self._lock:
+            self._trial = False
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+            else:
+                self._failures += 1
+                if self._failures >= self.max_failures:
+                    self._opened_at = self._clock()
+
+
+# --- Hedged Model Router ---
+# Backends are tried in preference order. The next one is started as soon as
+# the current one fails, or when it has not answered within hedge_after
+# seconds; the first non-empty answer wins and the rest are abandoned. The whole
+# call gives up at `deadline`. Backends whose breaker is open are skipped; a
+# breaker is only asked at the moment its backend would be started, since a
+# half-open allow() hands out the one trial call that record() must settle.
+class ModelRouter:
+    def __init__(self, backends, hedge_after=3.0, deadline=30.0, max_workers=8, breaker=CircuitBreaker):
+        self.backends = list(backends)  # [(name, fn(prompt) -> text)]
+        self.hedge_after = hedge_after
+        self.deadline = deadline
+        self.breakers = {name: breaker() for name, _ in self.backends}
+        self.wins = {name: 0 for name, _ in self.backends}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model")
+
+    def _call(self, name, fn, prompt):
+        try:
+            text = fn(prompt)
+        except Exception:
+            self.breakers[name].record(False)
+            raise
+        ok = bool(text and text.strip())
+        self.breakers[name].record(ok)
+        if not ok:
+            raise ModelUnavailable(f"{name} returned nothing")
+        return text
+
+    def _abandon(self, running):
+        for future, name in running.items():
+            if future.cancel():
+                self.breakers[name].release()
+
+    def generate(self, prompt):
+        queue = list(self.backends)
+        start = time.monotonic()
+        running = {}
+        errors = []
+        started = 0
+        next_hedge = start
+        while True:
+            now = time.monotonic()
+            if queue and (now >= next_hedge or not running):
+                name, fn = queue.pop(0)
+                if not self.breakers[name].allow():
+                    continue  # open: straight on to the next backend
+                started += 1
+                running[self._pool.submit(self._call, name, fn, prompt)] = name
+                count("model_calls")
+                next_hedge = now + self.hedge_after
+            remaining = start + self.deadline - now
+            if remaining <= 0:
+                break
+            timeout = min(remaining, max(next_hedge - now, 0)) if queue else remaining
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    text = future.result()
+                except Exception as e:
+                    errors.append(f"{name}: {e}")
+                    next_hedge = time.monotonic()  # fail over immediately
+                    continue
+                self._abandon(running)
+                self.wins[name] += 1
+                return text
+            if not running and not queue:
+                break
+        self._abandon(running)
+        if not started:
+            raise ModelUnavailable("all models are circuit-broken")
+        raise ModelUnavailable("; ".join(errors) or f"no answer within {self.deadline}s")
+
+
+# --- Fake backends for local runs ---
+class FakeModel:
+    def __init__(self, text="Generic|100g|50|gram", latency=0.0, jitter=0.0, error_rate=0.0, seed=None):
+        self.text = text
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def __call__(self, prompt):
+        self.calls += 1
+        time.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+        if self._rng.random() < self.error_rate:
+            raise RuntimeError("injected model error")
+        return self.text
+
+
+def demo():
+    scenarios = {
+        "primary healthy": (FakeModel("flash", latency=0.2), FakeModel("pro", latency=0.5)),
+        "primary slow": (FakeModel("flash", latency=3.0), FakeModel("pro", latency=0.5)),
+        "primary failing": (FakeModel("flash", latency=0.1, error_rate=1.0), FakeModel("pro", latency=0.5)),
+    }
+    for label, (primary, fallback) in scenarios.items():
+        router = ModelRouter([("flash", primary), ("pro", fallback)], hedge_after=0.8, deadline=5.0)
+        t0 = time.perf_counter()
+        answers = [router.generate("hi") for _ in range(5)]
+        per_call = (time.perf_counter() - t0) / len(answers)
+        print(f"{label:16} {per_call * 1000:6.0f} ms/call  wins={router.wins}  flash calls={primary.calls} breaker={router.breakers['flash'].state}")
+
+
+if __name__ == "__main__":
+    demo()
@@ -0,0 +1,292 @@
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from urllib.parse import quote
+
+import pandas as pd
+
+from schema import compact_log, concat_logs, plain_log
+from storage import ConflictError, CsvStore, GitHubBackend, LocalBackend, to_csv_bytes, to_json_bytes
+from tracing import carry
+
+LOG_COLUMNS = ["date", "user", "weight", "calories", "notes", "meal_type", "id"]
+MANIFEST_FORMAT = 1
+
+
+def month_keys(dates):
+    # "2026-10-17 08:30" -> "2026-10"; unparseable dates land in "unknown"
+    dt = pd.to_datetime(pd.Series(dates, dtype="object"), errors="coerce", format="mixed")
+    return dt.dt.strftime("%Y-%m").fillna("unknown")
+
+
+# --- Partitioned Log ---
+# data/<user>/<YYYY-MM>.csv plus data/manifest.json. Until the manifest exists
+# (i.e. before migrate() has run) everything reads and writes the legacy
+# single file, so old repos keep working unchanged.
+class PartitionedLog:
+    def __init__(self, store, root="data", legacy_path="data.csv", retries=3, backoff=0.25, read_workers=4):
+        self.store = store
+        self.root = root
+        self.legacy_path = legacy_path
+        self.retries = retries
+        self.backoff = backoff
+        self._pool = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="shard")
+        store.add_schema(self.owns, compact_log, plain_log)
+
+    def owns(self, path):
+        return path == self.legacy_path or (path.startswith(f"{self.root}/") and path.endswith(".csv"))
+
+    @property
+    def manifest_path(self):
+        return f"{self.root}/manifest.json"
+
+    def shard_path(self, user, month):
+        return f"{self.root}/{quote(str(user), safe='')}/{month}.csv"
+
+    def manifest(self):
+        try:
+            return self.store.read_json(self.manifest_path)
+        except FileNotFoundError:
+            return None
+
+    @property
+    def partitioned(self):
+        return self.store.version(self.manifest_path) is not None
+
+    def version(self):
+        # Every partitioned write also rewrites the manifest, so its SHA moves
+        # whenever any shard does
+        return self.store.version(self.manifest_path) or self.store.version(self.legacy_path)
+
+    def months(self, user):
+        manifest = self.manifest() or {}
+        parts = manifest.get("partitions", {}).get(str(user), {})
+        return sorted(parts)
+
+    def recent_months(self, user, today=None, count=2):
+        # What a view needs up front: this month and the one before (today,
+        # the weekly bank, the diary's default day) plus the latest month
+        # logged, for the last weight. None (everything) before migration,
+        # when the whole log is a single file anyway.
+        if not self.partitioned:
+            return None
+        first = (today or date.today()).replace(day=1)
+        months = set(self.months(user)[-1:])
+        for _ in range(count):
+            months.add(first.strftime("%Y-%m"))
+            first = (first - timedelta(days=1)).replace(day=1)
+        return months
+
+    def read(self, user=None, months=None):
+        manifest = self.manifest()
+        if manifest is None:
+            df = self._read_legacy()
+            if user is not None and not df.empty:
+                df = df[df["user"] == user]
+            if months is not None and not df.empty:
+                df = df[month_keys(df["date"]).isin(list(months)).to_numpy()]
+            return df.reset_index(drop=True)
+        paths = []
+        for u, parts in manifest.get("partitions", {}).items():
+            if user is not None and u != str(user):
+                continue
+            for month in sorted(parts):
+                if months is None or month in months:
+                    paths.append(self.shard_path(u, month))
+        if not paths:
+            return pd.DataFrame(columns=LOG_COLUMNS)
+        # One listing per user directory first, so the parallel reads below
+        # share it instead of each fetching their own; then the blobs
+        # download side by side
+        for path in {os.path.dirname(p): p for p in paths}.values():
+            self.store.version(path)
+        futures = [self._pool.submit(carry(self.store.read_frame), path) for path in paths]
+        return concat_logs([f.result() for f in futures])
+
+    def _read_legacy(self):
+        try:
+            return self.store.read_frame(self.legacy_path)
+        except FileNotFoundError:
+            return pd.DataFrame(columns=LOG_COLUMNS)
+
+    # --- Writes ---
+    def append(self, rows, message):
+        rows = pd.DataFrame(rows)
+        if rows.empty:
+            return
+        keys = [rows["user"].astype(str).to_numpy(object), month_keys(rows["date"]).to_numpy(object)]
+        groups = {k: g for k, g in rows.groupby(keys, sort=False)}
+
+        def apply(current):
+            return {k: _concat(current[k], new) for k, new in groups.items()}
+        self._commit(list(groups), apply, lambda base: _concat(base, rows), message)
+
+    def modify(self, user, month, fn, message):
+        # Read-modify-write of a single shard, retried on concurrent commits
+        apply = lambda current: {k: fn(df) for k, df in current.items()}
+        self._commit([(str(user), month)], apply, fn, message)
+
+    def _commit(self, keys, apply, apply_legacy, message):
+        fresh = False
+        for attempt in range(self.retries + 1):
+            try:
+                if self.store.version(self.manifest_path, fresh=fresh) is not None:
+                    self._commit_shards(keys, apply, message, fresh)
+                else:
+                    self._commit_legacy(apply_legacy, message, fresh)
+                return
+            except ConflictError:
+                if attempt == self.retries:
+                    raise
+                # Someone else committed: wait a little (jittered, so two
+                # writers don't collide again) and re-read every SHA from the
+                # repo instead of the cached listings they came from
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+                fresh = True
+
+    def _commit_legacy(self, apply, message, fresh=False):
+        sha = self.store.version(self.legacy_path, fresh=fresh)
+        base = self._read_legacy() if sha else pd.DataFrame(columns=LOG_COLUMNS)
+        self.store.write_frame(apply(base), self.legacy_path, message, expected_sha=sha)
+
+    def _commit_shards(self, keys, apply, message, fresh=False):
+        manifest_sha = self.store.version(self.manifest_path, fresh=fresh)
+        manifest = self.store.read_json(self.manifest_path)
+        expected = {self.manifest_path: manifest_sha}
+        current = {}
+        for user, month in keys:
+            path = self.shard_path(user, month)
+            sha = self.store.version(path, fresh=fresh)
+            expected[path] = sha
+            current[(user, month)] = self.store.read_frame(path) if sha else pd.DataFrame(columns=LOG_COLUMNS)
+        updated = apply(current)
+        files = {self.shard_path(u, m): df for (u, m), df in updated.items()}
+        for (user, month), df in updated.items():
+            _record(manifest, user, month, df)
+        files[self.manifest_path] = manifest
+        self.store.write_many(files, message, expected=expected)
+
+    # --- Bulk import ---
+    def iter_frames(self):
+        # (path, sha, frame) one stored file at a time, for bounded-memory scans
+        manifest = self.manifest()
+        if manifest is None:
+            sha = self.store.version(self.legacy_path)
+            if sha:
+                yield self.legacy_path, sha, self._read_legacy()
+            return
+        yield self.manifest_path, self.store.version(self.manifest_path), None
+        for user, parts in manifest.get("partitions", {}).items():
+            for month in sorted(parts):
+                path = self.shard_path(user, month)
+                yield path, self.store.version(path), self.store.read_frame(path, cache=False)
+
+    def commit_spool(self, spool, message, versions, chunksize=100_000):
+        # spool.files: {(user, month): csv of new rows}, spool.stats: {(user,
+        # month): [rows, first, last]}; versions: {path: sha} as seen when the
+        # duplicates were checked. Lands in one commit, shard by shard, and
+        # fails with ConflictError if anything moved meanwhile.
+        if not self.partitioned:
+            expected = {self.legacy_path: versions.get(self.legacy_path)}
+            self.store.write_stream([(self.legacy_path, self._stream_legacy(spool, expected[self.legacy_path], chunksize))], message, expected=expected)
+            return
+        manifest = self.store.read_json(self.manifest_path)
+        expected = {self.manifest_path: versions.get(self.manifest_path)}
+        for user, month in spool.files:
+            expected[self.shard_path(user, month)] = versions.get(self.shard_path(user, month))
+
+        def pairs():
+            for (user, month), spool_file in sorted(spool.files.items()):
+                path = self.shard_path(user, month)
+                if expected[path]:
+                    merged = _concat(self.store.read_frame(path, cache=False), pd.read_csv(spool_file))
+                    _record(manifest, user, month, merged)
+                    yield path, to_csv_bytes(merged)
+                else:
+                    # A brand-new shard: the spooled CSV already is the file
+                    rows, first, last = spool.stats[(user, month)]
+                    manifest.setdefault("partitions", {}).setdefault(str(user), {})[month] = {"rows": rows, "first": first, "last": last}
+                    with open(spool_file, "rb") as f:
+                        yield path, f.read()
+            yield self.manifest_path, to_json_bytes(manifest)
+        self.store.write_stream(pairs(), message, expected=expected)
+
+    def _stream_legacy(self, spool, sha, chunksize):
+        # Unmigrated repo: the existing file and the spooled rows are copied
+        # into one CSV chunk by chunk, as text (values are written back
+        # exactly as read), so no frame of the whole import is ever built;
+        # only the raw bytes of the result are held, for the upload
+        existing = self.store.read_raw(self.legacy_path, sha) if sha else b""
+        sources = [io.BytesIO(existing)] if existing.strip() else []
+        sources += list(spool.files.values())
+        columns = list(pd.read_csv(io.BytesIO(existing), nrows=0).columns) if existing.strip() else []
+        columns += [c for c in LOG_COLUMNS if c not in columns]
+        with tempfile.TemporaryFile() as out:
+            header = True
+            for source in sources:
+                for chunk in pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False):
+                    out.write(chunk.reindex(columns=columns, fill_value="").to_csv(index=False, header=header).encode())
+                    header = False
+            del existing, sources
+            out.seek(0)
+            return out.read()
+
+    # --- Migration ---
+    def migrate(self, message="Partition data.csv by user and month"):
+        if self.partitioned:
+            return 0
+        sha = self.store.version(self.legacy_path)
+        legacy = self._read_legacy()
+        manifest = {"format": MANIFEST_FORMAT, "migrated_from": self.legacy_path, "partitions": {}}
+        files = {}
+        if not legacy.empty:
+            for col in LOG_COLUMNS:
+                if col not in legacy.columns:
+                    legacy[col] = ""
+            months = month_keys(legacy["date"]).to_numpy(object)
+            for (user, month), shard in legacy.groupby([legacy["user"].astype(str).to_numpy(object), months], sort=True):
+                shard = shard.reset_index(drop=True)
+                files[self.shard_path(user, month)] = shard
+                _record(manifest, user, month, shard)
+        files[self.manifest_path] = manifest
+        expected = {path: None for path in files}
+        if sha:
+            expected[self.legacy_path] = sha
+        self.store.write_many(files, message, expected=expected)
+        return len(legacy)
+
+
+def _concat(base, new):
+    # Concatenating onto an empty placeholder would turn every column into object
+    if base.empty:
+        return new.reset_index(drop=True)
+    return pd.concat([base, new], ignore_index=True)
+
+
+def _record(manifest, user, month, df):
+    dates = df["date"].astype(str) if not df.empty else pd.Series([], dtype="object")
+    manifest.setdefault("partitions", {}).setdefault(str(user), {})[month] = {
+        "rows": int(len(df)),
+        "first": dates.min() if len(dates) else None,
+        "last": dates.max() if len(dates) else None,
+    }
+
+
+def open_store(args):
+    if args.local:
+        return CsvStore(LocalBackend(args.local))
+    return CsvStore(GitHubBackend(os.environ["GITHUB_TOKEN"], args.repo))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="One-time migration of data.csv into per-user monthly shards")
+    parser.add_argument("--local", help="Local data directory instead of GitHub")
+    parser.add_argument("--repo", default="badinlee/sister-fitness", help="GitHub repo (token from GITHUB_TOKEN)")
+    args = parser.parse_args()
+    moved = PartitionedLog(open_store(args)).migrate()
+    print(f"Migrated {moved} rows")
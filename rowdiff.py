@@ -0,0 +1,74 @@
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from storage import new_row_id
+
+
+@dataclass
+class RowDiff:
+    inserts: list = field(default_factory=list)   # new row dicts
+    updates: dict = field(default_factory=dict)   # id -> {column: value}
+    deletes: list = field(default_factory=list)   # ids
+
+    def __bool__(self):
+        return bool(self.inserts or self.updates or self.deletes)
+
+
+def _differs(a, b):
+    if pd.isna(a) and pd.isna(b):
+        return False
+    try:
+        return float(a) != float(b)
+    except (TypeError, ValueError):
+        return str(a) != str(b)
+
+
+def _blank(value):
+    return value is None or (not isinstance(value, str) and pd.isna(value)) or str(value).strip() == ""
+
+
+# --- Diff ---
+# original / edited carry the row id in a `key` column (hidden in the
+# st.data_editor, which keeps a plain RangeIndex); rows added in the editor
+# come back with a blank id and are inserts.
+def diff_rows(original, edited, columns, key="id"):
+    diff = RowDiff()
+    before = original.set_index(key)
+    seen = set()
+    for row in edited.to_dict("records"):
+        row_id = row.get(key)
+        values = {c: row[c] for c in columns}
+        if not _blank(row_id) and row_id in before.index and row_id not in seen:
+            seen.add(row_id)
+            changed = {c: v for c, v in values.items() if _differs(before.at[row_id, c], v)}
+            if changed:
+                diff.updates[row_id] = changed
+        elif not all(pd.isna(v) for v in values.values()):
+            diff.inserts.append(values)
+    diff.deletes = [row_id for row_id in before.index if row_id not in seen]
+    return diff
+
+
+# --- Apply ---
+# Works against whatever version of the shard is current, so a diff computed
+# on a stale copy rebases cleanly: rows the other sister added are untouched,
+# and updates/deletes of rows that no longer exist are dropped.
+def apply_diff(df, diff, defaults):
+    df = df[~df["id"].isin(diff.deletes)].copy()
+    if diff.updates:
+        positions = pd.Series(range(len(df)), index=df["id"].to_numpy(object))
+        for row_id, changes in diff.updates.items():
+            if row_id not in positions.index:
+                continue
+            for col, value in changes.items():
+                try:
+                    df.iloc[positions[row_id], df.columns.get_loc(col)] = value
+                except (TypeError, ValueError):
+                    # e.g. a fractional calorie edit landing in an int column
+                    df[col] = df[col].astype(object)
+                    df.iloc[positions[row_id], df.columns.get_loc(col)] = value
+    if diff.inserts:
+        new_rows = pd.DataFrame([{**defaults, **row, "id": new_row_id()} for row in diff.inserts])
+        df = pd.concat([df, new_rows], ignore_index=True)
+    return df
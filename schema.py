@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# --- Log Schema ---
+# Columns every log frame has after load, with the value used when a column is
+# missing altogether (old files predate meal_type / notes).
+LOG_DEFAULTS = {"date": "", "user": "", "weight": 0.0, "calories": 0, "notes": "", "meal_type": ""}
+CATEGORICAL = ["user", "meal_type", "notes", "iso_date"]
+
+
+def compact_log(df):
+    # Repair and downcast in one vectorised pass. Text that repeats (users,
+    # meals, food names, days) becomes categorical, calories int32 (float32
+    # if anyone logged a fraction) and weight float32; dt stays datetime64.
+    # The date text is kept as is, it is what gets written back.
+    for col, default in LOG_DEFAULTS.items():
+        if col not in df.columns:
+            df[col] = default
+    # Blank cells read back as NaN; as categoricals they could no longer be
+    # filled with "" (not a category), so they become "" here
+    df[["notes", "meal_type"]] = df[["notes", "meal_type"]].fillna("")
+    calories = pd.to_numeric(df["calories"], errors="coerce").fillna(0).to_numpy(float)
+    whole = (calories % 1 == 0).all() and (np.abs(calories) < 2**31).all()
+    df["calories"] = calories.astype("int32" if whole else "float32")
+    df["weight"] = pd.to_numeric(df["weight"], errors="coerce").astype("float32")
+    for col in CATEGORICAL:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def plain_log(df):
+    # For writing: float32 weights back to the value that was typed (69.9, not
+    # 69.9000015258789) and whole calories without a trailing ".0"
+    if "weight" not in df.columns or "calories" not in df.columns:
+        return df
+    weight = pd.to_numeric(df["weight"], errors="coerce").astype("float64").round(4)
+    calories = pd.to_numeric(df["calories"], errors="coerce").astype("float64").round(2)
+    whole = calories % 1 == 0
+    if whole[calories.notna()].all():
+        calories = calories.astype("Int64")
+    else:
+        calories = calories.astype(object).where(~whole, calories.round().astype("Int64").astype(object))
+    return df.assign(weight=weight, calories=calories)
+
+
+def concat_logs(frames):
+    # pd.concat falls back to plain strings when categoricals disagree on
+    # their categories (every shard has its own), so those columns are
+    # recoded against the union of categories; the rest go column by column,
+    # which is much cheaper than a frame-level concat over dozens of shards
+    frames = [f for f in frames if len(f.columns)]
+    if not frames:
+        return pd.DataFrame()
+    columns = list(frames[0].columns)
+    if len(frames) == 1 or any(list(f.columns) != columns for f in frames):
+        return pd.concat(frames, ignore_index=True)
+    data = {}
+    for col in columns:
+        parts = [f[col] for f in frames]
+        dtypes = {p.dtype for p in parts}
+        if all(isinstance(d, pd.CategoricalDtype) for d in dtypes):
+            data[col] = _union([p.array for p in parts])
+        elif len(dtypes) == 1 and isinstance(next(iter(dtypes)), np.dtype):
+            data[col] = np.concatenate([p.to_numpy() for p in parts])
+        else:
+            data[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data, copy=False)
+
+
+def _union(parts):
+    positions = {}
+    codes = []
+    for p in parts:
+        # Trailing -1 keeps missing values (code -1) missing
+        mapping = np.array([positions.setdefault(c, len(positions)) for c in p.categories.tolist()] + [-1], dtype=np.int32)
+        codes.append(mapping[p.codes])
+    return pd.Categorical.from_codes(np.concatenate(codes), dtype=pd.CategoricalDtype(list(positions)))
+
+
+def memory_report(raw, compact):
+    # Deep per-column bytes, before and after
+    before = raw.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "before_kib": before / 1024,
+        "after_kib": after.reindex(before.index.union(after.index)) / 1024,
+        "before_dtype": raw.dtypes.astype(str),
+        "after_dtype": compact.dtypes.astype(str),
+    })
+    report.loc["total"] = [before.sum() / 1024, after.sum() / 1024, "", ""]
+    report["ratio"] = report["before_kib"] / report["after_kib"]
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    import io
+
+    from storage import add_date_columns, add_row_ids
+
+    parser = argparse.ArgumentParser(description="Memory of the log frame as parsed before vs with the compact schema")
+    parser.add_argument("path", nargs="?", help="A log CSV (default: a synthetic log from bench.py)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    if args.path:
+        with open(args.path, "rb") as f:
+            data = f.read()
+    else:
+        from bench import generate_log
+        data = generate_log(args.rows).to_csv(index=False).encode()
+    raw = add_row_ids(add_date_columns(pd.read_csv(io.BytesIO(data))))
+    compact = compact_log(raw.copy())
+    pd.set_option("display.width", 120)
+    print(f"{len(raw):,} rows")
+    print(memory_report(raw, compact).round(1).to_string())
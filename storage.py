@@ -0,0 +1,441 @@
+import base64
+import copy
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+from tracing import count, span
+
+
+class ConflictError(Exception):
+    # Raised when a write was based on a blob SHA that is no longer current
+    pass
+
+
+DERIVED_COLUMNS = ["dt", "iso_date"]
+ID_KEY_COLUMNS = ["date", "user", "calories", "notes", "meal_type"]
+
+
+def add_date_columns(df):
+    # Parsed once per blob and kept in the cache / columnar mirror, so reruns
+    # never repeat pd.to_datetime + strftime over the history
+    if "date" in df.columns:
+        df["dt"] = pd.to_datetime(df["date"], errors="coerce", format="mixed")
+        df["iso_date"] = df["dt"].dt.strftime("%Y-%m-%d")
+    return df
+
+
+def new_row_id():
+    return uuid.uuid4().hex[:12]
+
+
+def add_row_ids(df):
+    # Rows written before ids existed get one derived from their content, with
+    # an occurrence counter for exact duplicates; it is persisted on next write
+    if "date" not in df.columns:
+        return df
+    if "id" not in df.columns:
+        df["id"] = pd.Series(pd.NA, index=df.index, dtype="object")
+    missing = df["id"].isna()
+    if missing.any():
+        keys = df.loc[missing, [c for c in ID_KEY_COLUMNS if c in df.columns]].astype(str)
+        hashes = pd.util.hash_pandas_object(keys, index=False)
+        occurrence = hashes.groupby(hashes).cumcount()
+        df.loc[missing, "id"] = [f"{h:016x}"[:12] + (f"-{n}" if n else "") for h, n in zip(hashes, occurrence)]
+    return df
+
+
+def to_csv_bytes(df):
+    return add_row_ids(df.drop(columns=DERIVED_COLUMNS, errors="ignore")).to_csv(index=False).encode()
+
+
+def to_json_bytes(doc):
+    return json.dumps(doc, indent=1, sort_keys=True).encode()
+
+
+def blob_sha(data):
+    # Same SHA GitHub reports for a file, so local and remote backends agree
+    header = f"blob {len(data)}\0".encode()
+    return hashlib.sha1(header + data).hexdigest()
+
+
+# --- LRU + TTL Cache ---
+class LRUCache:
+    def __init__(self, max_entries=32, ttl=300.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            stored_at, value = item
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                del self._items[key]
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (self._clock(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def discard(self, predicate):
+        with self._lock:
+            for key in [k for k in self._items if predicate(k)]:
+                del self._items[key]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+# --- Backends ---
+class LocalBackend:
+    # Offline stand-in for the GitHub repo: plain files under a directory
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _full(self, path):
+        return os.path.join(self.root, path)
+
+    def sha(self, path, fresh=False):
+        # Always read from disk, so fresh makes no difference here
+        try:
+            with open(self._full(path), "rb") as f:
+                return blob_sha(f.read())
+        except FileNotFoundError:
+            return None
+
+    def read(self, path, sha=None):
+        with open(self._full(path), "rb") as f:
+            data = f.read()
+        count("bytes_in", len(data))
+        return data, blob_sha(data)
+
+    def write(self, path, data, message, expected_sha=None):
+        if isinstance(data, str):
+            data = data.encode()
+        with self._lock:
+            current = self.sha(path)
+            if expected_sha is not None and current != expected_sha:
+                raise ConflictError(path)
+            full = self._full(path)
+            os.makedirs(os.path.dirname(full) or ".", exist_ok=True)
+            tmp = full + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, full)
+        count("bytes_out", len(data))
+        return blob_sha(data)
+
+    def write_many(self, files, message, expected=None):
+        # files: {path: bytes} or an iterable of (path, bytes) pairs
+        expected = expected or {}
+        pairs = files.items() if isinstance(files, dict) else files
+        shas = {}
+        with self._lock:
+            for path, sha in expected.items():
+                if self.sha(path) != sha:
+                    raise ConflictError(path)
+            staged = []
+            for path, data in pairs:
+                full = self._full(path)
+                os.makedirs(os.path.dirname(full) or ".", exist_ok=True)
+                with open(full + ".tmp", "wb") as f:
+                    f.write(data)
+                count("bytes_out", len(data))
+                staged.append(full)
+                shas[path] = blob_sha(data)
+            for full in staged:
+                os.replace(full + ".tmp", full)
+        return shas
+
+
+class GitHubBackend:
+    # One long-lived client per process; requests' connection pool is reused
+    # across reruns instead of a fresh Github() per load_csv call.
+    def __init__(self, token, repo_name, listing_ttl=2.0, pool_size=4):
+        from github import Auth, Github
+        self._gh = Github(auth=Auth.Token(token), pool_size=pool_size)
+        self._repo_name = repo_name
+        self._repo = None
+        self.listing_ttl = listing_ttl
+        self._listings = {}  # dir -> (fetched_at, {path: sha})
+        self._lock = threading.Lock()
+
+    @property
+    def repo(self):
+        if self._repo is None:
+            count("github_calls")
+            self._repo = self._gh.get_repo(self._repo_name)
+        return self._repo
+
+    def _listing(self, directory, fresh=False):
+        # One directory listing answers the SHA check for every file in it,
+        # so the three CSV loads of a rerun cost a single cheap request.
+        from github import GithubException
+        now = time.monotonic()
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached and not fresh and now - cached[0] <= self.listing_ttl:
+                return cached[1]
+        try:
+            count("github_calls")
+            entries = self.repo.get_contents(directory)
+        except GithubException as e:
+            # Only a 404 means "no such directory". Rate limits, 5xx and
+            # network errors propagate and are not cached: reading them as
+            # empty would hide the profiles and send log writes to the
+            # pre-migration data.csv
+            if e.status != 404:
+                raise
+            entries = []
+        if not isinstance(entries, list):
+            entries = [entries]
+        shas = {e.path: e.sha for e in entries if e.type == "file"}
+        with self._lock:
+            self._listings[directory] = (now, shas)
+        return shas
+
+    def _remember(self, path, sha):
+        with self._lock:
+            cached = self._listings.get(os.path.dirname(path))
+            if cached:
+                cached[1][path] = sha
+
+    def sha(self, path, fresh=False):
+        return self._listing(os.path.dirname(path), fresh=fresh).get(path)
+
+    def read(self, path, sha=None):
+        sha = sha or self.sha(path)
+        if sha is None:
+            raise FileNotFoundError(path)
+        # Blobs are addressed by SHA, so this never returns a stale copy
+        count("github_calls")
+        blob = self.repo.get_git_blob(sha)
+        data = base64.b64decode(blob.content)
+        count("bytes_in", len(data))
+        return data, sha
+
+    def write(self, path, data, message, expected_sha=None):
+        from github import GithubException
+        if isinstance(data, str):
+            data = data.encode()
+        current = expected_sha or self.sha(path, fresh=True)
+        count("github_calls")
+        count("bytes_out", len(data))
+        try:
+            if current:
+                result = self.repo.update_file(path, message, data, current)
+            else:
+                result = self.repo.create_file(path, message, data)
+        except GithubException as e:
+            if e.status in (409, 422):
+                with self._lock:
+                    self._listings.pop(os.path.dirname(path), None)
+                raise ConflictError(path) from e
+            raise
+        new_sha = result["content"].sha
+        self._remember(path, new_sha)
+        return new_sha
+
+    def write_many(self, files, message, expected=None):
+        # Several files in one commit via the git data API. The branch only
+        # moves if nobody else committed since we read it (no force push).
+        from github import GithubException, InputGitTreeElement
+        expected = expected or {}
+        repo = self.repo
+        count("github_calls", 2)
+        ref = repo.get_git_ref(f"heads/{repo.default_branch}")
+        base = repo.get_git_commit(ref.object.sha)
+        listings = {}
+        for path, sha in expected.items():
+            directory = os.path.dirname(path)
+            if directory not in listings:
+                count("github_calls")
+                try:
+                    entries = repo.get_contents(directory, ref=base.sha)
+                except GithubException as e:
+                    if e.status != 404:
+                        raise
+                    entries = []
+                if not isinstance(entries, list):
+                    entries = [entries]
+                listings[directory] = {e.path: e.sha for e in entries}
+            if listings[directory].get(path) != sha:
+                # Our cached listings are what the caller's SHAs came from;
+                # drop them so the retry sees the other writer's commit
+                with self._lock:
+                    for stale in {os.path.dirname(p) for p in expected}:
+                        self._listings.pop(stale, None)
+                raise ConflictError(path)
+        elements = []
+        shas = {}
+        for path, data in files.items() if isinstance(files, dict) else files:
+            shas[path] = blob_sha(data)
+            count("bytes_out", len(data))
+            if len(data) > 256 * 1024:
+                # Upload big files (bulk imports) straight away so only their
+                # SHA is held until the tree is created
+                count("github_calls")
+                blob = repo.create_git_blob(base64.b64encode(data).decode(), "base64")
+                elements.append(InputGitTreeElement(path, "100644", "blob", sha=blob.sha))
+            else:
+                elements.append(InputGitTreeElement(path, "100644", "blob", content=data.decode()))
+        count("github_calls", 3)  # tree, commit, ref update
+        tree = repo.create_git_tree(elements, base.tree)
+        commit = repo.create_git_commit(message, tree, [base])
+        try:
+            ref.edit(commit.sha)
+        except GithubException as e:
+            if e.status == 422:
+                with self._lock:
+                    self._listings.clear()
+                raise ConflictError(", ".join(shas)) from e
+            raise
+        for path, sha in shas.items():
+            self._remember(path, sha)
+        return shas
+
+
+# --- Parsed Frame Store ---
+class CsvStore:
+    def __init__(self, backend, max_entries=256, ttl=300.0, mirror=None):
+        self.backend = backend
+        self.cache = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.mirror = mirror
+        self.schemas = []
+
+    def add_schema(self, match, fn, encode=None):
+        # fn(df) -> df is applied to frames whose path passes match(path)
+        # before they are cached, mirrored or returned; encode(df) -> df
+        # before they are written out
+        self.schemas.append((match, fn, encode))
+
+    def _typed(self, path, df):
+        for match, fn, _ in self.schemas:
+            if match(path):
+                return fn(df)
+        return df
+
+    def _encoded(self, path, df):
+        for match, _, encode in self.schemas:
+            if match(path):
+                return encode(df) if encode else df
+        return df
+
+    def version(self, path, fresh=False):
+        # fresh=True skips the backend's cached directory listing
+        return self.backend.sha(path, fresh=fresh)
+
+    def read_frame(self, path, cache=True):
+        # cache=False is for one-off scans (bulk import): the file is parsed as
+        # is, without derived columns, and kept out of the cache
+        with span("storage.read", path=path) as s:
+            sha = self.backend.sha(path)
+            if sha is None:
+                raise FileNotFoundError(path)
+            if not cache:
+                return pd.read_csv(io.BytesIO(self.backend.read(path, sha)[0]))
+            df = self.cache.get((path, sha))
+            source = "memory"
+            if df is None and self.mirror is not None:
+                with span("mirror.load"):
+                    df = self.mirror.load(path, sha)
+                if df is not None:
+                    source = "mirror"
+                    df = self._typed(path, df)
+                    self._store(path, sha, df)
+            if df is None:
+                source = "download"
+                with span("io.download"):
+                    data, sha = self.backend.read(path, sha)
+                with span("parse.csv"):
+                    df = self._typed(path, add_row_ids(add_date_columns(pd.read_csv(io.BytesIO(data)))))
+                self._store(path, sha, df)
+                self._mirror(path, sha, df)
+            if s is not None:
+                s.attrs["source"] = source
+            # Copy-on-write (always on from pandas 3, pinned in requirements.txt):
+            # callers can modify this without touching the cached frame, and
+            # nothing is copied unless they do
+            return df.copy(deep=False)
+
+    def read_json(self, path):
+        sha = self.backend.sha(path)
+        if sha is None:
+            raise FileNotFoundError(path)
+        doc = self.cache.get((path, sha))
+        if doc is None:
+            data, sha = self.backend.read(path, sha)
+            doc = json.loads(data)
+            self._store(path, sha, doc)
+        return copy.deepcopy(doc)
+
+    def read_raw(self, path, sha=None):
+        # The file's bytes, neither parsed nor cached (streamed copies)
+        return self.backend.read(path, sha)[0]
+
+    def write_frame(self, df, path, message, expected_sha=None):
+        with span("storage.write", path=path):
+            sha = self.backend.write(path, to_csv_bytes(self._encoded(path, df)), message, expected_sha=expected_sha)
+        self._written(path, sha, df)
+        return sha
+
+    def write_many(self, files, message, expected=None):
+        # files: {path: DataFrame (written as CSV) or dict (written as JSON)}
+        encoded = {}
+        for path, value in files.items():
+            if isinstance(value, pd.DataFrame):
+                encoded[path] = to_csv_bytes(self._encoded(path, value))
+            else:
+                encoded[path] = to_json_bytes(value)
+        with span("storage.write", files=len(encoded)):
+            shas = self.backend.write_many(encoded, message, expected=expected)
+        for path, sha in shas.items():
+            value = files[path]
+            if isinstance(value, pd.DataFrame):
+                self._written(path, sha, value)
+            else:
+                self._store(path, sha, copy.deepcopy(value))
+        return shas
+
+    def write_stream(self, pairs, message, expected=None):
+        # (path, bytes) pairs produced lazily, e.g. by the bulk importer; the
+        # frames are not cached, their new SHAs simply miss on the next read
+        with span("storage.write"):
+            return self.backend.write_many(pairs, message, expected=expected)
+
+    def _written(self, path, sha, df):
+        df = self._typed(path, add_row_ids(add_date_columns(df.drop(columns=DERIVED_COLUMNS, errors="ignore"))))
+        self._store(path, sha, df)
+        self._mirror(path, sha, df)
+
+    def _mirror(self, path, sha, df):
+        if self.mirror is not None:
+            with span("mirror.save"):
+                self.mirror.save(path, sha, df)
+
+    def _store(self, path, sha, df):
+        # Older versions of the same file are never read again
+        self.cache.discard(lambda k: k[0] == path and k[1] != sha)
+        self.cache.put((path, sha), df)
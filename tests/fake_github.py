@@ -0,0 +1,108 @@
+import base64
+import itertools
+import os
+from types import SimpleNamespace
+
+from github import GithubException
+
+from storage import GitHubBackend, blob_sha
+
+
+# --- In-memory stand-in for the PyGithub Repository API ---
+# Just the calls GitHubBackend makes: contents listings, blobs, and the git
+# data API (tree / commit / ref) with the same "ref only moves forward from
+# what you based on" rule, so concurrent writers conflict like on GitHub.
+class FakeRepo:
+    default_branch = "main"
+
+    def __init__(self):
+        self.blobs = {}
+        self.trees = {"t0": {}}  # tree id -> {path: blob sha}
+        self.commits = {"c0": "t0"}  # commit sha -> tree id
+        self.head = "c0"
+        self.listing_calls = 0
+        self.fail_listing = None  # status to raise from get_contents, e.g. 403
+        self._ids = itertools.count(1)
+
+    def files(self, ref=None):
+        return self.trees[self.commits[ref or self.head]]
+
+    def _blob(self, data):
+        sha = blob_sha(data)
+        self.blobs[sha] = data
+        return sha
+
+    def get_contents(self, directory, ref=None):
+        self.listing_calls += 1
+        if self.fail_listing:
+            raise GithubException(self.fail_listing, {"message": "failed"}, None)
+        entries = {}
+        for path, sha in self.files(ref).items():
+            parent = os.path.dirname(path)
+            if parent == directory:
+                entries[path] = SimpleNamespace(path=path, sha=sha, type="file")
+            elif parent.startswith(f"{directory}/" if directory else ""):
+                sub = parent[len(directory):].lstrip("/").split("/")[0]
+                sub = f"{directory}/{sub}" if directory else sub
+                entries[sub] = SimpleNamespace(path=sub, sha="", type="dir")
+        if not entries:
+            raise GithubException(404, {"message": "Not Found"}, None)
+        return list(entries.values())
+
+    def get_git_blob(self, sha):
+        return SimpleNamespace(content=base64.b64encode(self.blobs[sha]).decode())
+
+    def create_git_blob(self, content, encoding):
+        return SimpleNamespace(sha=self._blob(base64.b64decode(content)))
+
+    def get_git_ref(self, name):
+        repo = self
+        based_on = self.head
+
+        def edit(sha):
+            if repo.head != based_on:
+                raise GithubException(422, {"message": "Update is not a fast forward"}, None)
+            repo.head = sha
+        return SimpleNamespace(object=SimpleNamespace(sha=based_on), edit=edit)
+
+    def get_git_commit(self, sha):
+        return SimpleNamespace(sha=sha, tree=self.commits[sha])
+
+    def create_git_tree(self, elements, base_tree):
+        files = dict(self.trees[base_tree])
+        for element in elements:
+            e = element._identity
+            files[e["path"]] = e["sha"] if "sha" in e else self._blob(e["content"].encode())
+        tree = f"t{next(self._ids)}"
+        self.trees[tree] = files
+        return tree
+
+    def create_git_commit(self, message, tree, parents):
+        sha = f"c{next(self._ids)}"
+        self.commits[sha] = tree
+        return SimpleNamespace(sha=sha)
+
+    def create_file(self, path, message, content):
+        if path in self.files():
+            raise GithubException(422, {"message": "sha wasn't supplied"}, None)
+        return self.put(path, content)
+
+    def update_file(self, path, message, content, sha):
+        if self.files().get(path) != sha:
+            raise GithubException(409, {"message": "does not match"}, None)
+        return self.put(path, content)
+
+    def put(self, path, data):
+        # Commit a file directly, as another client would
+        tree = f"t{next(self._ids)}"
+        self.trees[tree] = {**self.files(), path: self._blob(data)}
+        sha = f"c{next(self._ids)}"
+        self.commits[sha] = tree
+        self.head = sha
+        return {"content": SimpleNamespace(sha=self.trees[tree][path])}
+
+
+def github_backend(repo, **kwargs):
+    backend = GitHubBackend("token", "owner/repo", **kwargs)
+    backend._repo = repo
+    return backend
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from aggregates import DailyIndex
+from storage import add_date_columns
+
+
+def history(rows):
+    return add_date_columns(pd.DataFrame(rows, columns=["date", "user", "weight", "calories"]))
+
+
+ROWS = [
+    ("2026-09-01 08:00", "Me", 72.0, 400),
+    ("2026-09-01 19:00", "Me", 72.0, 900),
+    ("2026-10-16 08:00", "Me", 70.5, 350),
+    ("2026-10-17 08:00", "Me", 70.1, 420),
+]
+
+
+def test_editing_an_old_day_keeps_the_latest_weight_and_skips_the_rebuild():
+    index = DailyIndex()
+    index.sync("Me", history(ROWS), 1)
+    assert index.rebuilds == 1
+    assert index.latest_weight("Me") == 70.1
+
+    # Diary edit of 1 September: its rows are replayed with that day's weight
+    edited = [ROWS[0], ("2026-09-01 19:00", "Me", 72.0, 700)]
+    index.replace_day("Me", "2026-09-01", history(edited).to_dict("records"))
+    assert index.latest_weight("Me") == 70.1
+    assert index.calories("Me", "2026-09-01") == 1100
+
+    assert not index.sync("Me", history(edited + ROWS[2:]), 2)
+    assert index.rebuilds == 1
+
+
+def test_newer_rows_replace_the_weight():
+    index = DailyIndex()
+    index.sync("Me", history(ROWS), 1)
+    index.add([{"date": "2026-10-17 12:00", "user": "Me", "weight": 69.8, "calories": 0}])
+    assert index.latest_weight("Me") == 69.8
+    # A back-dated entry counts towards its day but is not the current weight
+    index.add([{"date": "2026-10-01 12:00", "user": "Me", "weight": 75.0, "calories": 100}])
+    assert index.latest_weight("Me") == 69.8
+    assert index.calories("Me", "2026-10-01") == 100
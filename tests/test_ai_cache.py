@@ -0,0 +1,42 @@
+from ai_cache import AICache
+
+
+def test_no_second_call_when_leader_finished_after_the_first_check(tmp_path):
+    cache = AICache(str(tmp_path / "cache.sqlite3"))
+    key = cache.make_key("food", 1, "banana")
+    # Another session's leader stored the result and left between this
+    # caller's unlocked check and taking the lock
+    cache.put(key, {"cals": 89})
+    cache.get = lambda key: None
+
+    calls = []
+    value = cache.get_or_compute(key, lambda: calls.append(1) or {"cals": 0})
+
+    assert value == {"cals": 89}
+    assert calls == [] and cache.hits == 1 and cache.misses == 0
+    assert not cache._inflight
+
+
+def test_concurrent_misses_share_one_call(tmp_path):
+    import threading
+
+    cache = AICache(str(tmp_path / "cache.sqlite3"))
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"cals": 52}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    while not cache._inflight:
+        pass
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == [1] and results == [{"cals": 52}] * 4
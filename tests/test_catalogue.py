@@ -0,0 +1,49 @@
+import csv
+
+from catalogue import Catalogue, build
+from food_search import FoodIndex
+
+ROWS = [
+    ["brand", "product_name", "serving_size", "energy_kcal", "energy_kj", "protein_g"],
+    ["Anchor", "Blue Milk", "100ml", "66", "", "3.3"],
+    ["Anchor", "Trim Milk", "100ml", "35", "", ""],
+    ["Anchor", "Butter", "10g", "74", "", ""],
+    ["Farrah's", "Original Wraps", "1 wrap", "", "690", ""],
+    ["Pams", "Oat Milk", "100ml", "", "", ""],  # no energy: skipped
+]
+
+
+def make_catalogue(tmp_path):
+    source = tmp_path / "products.csv"
+    with open(source, "w", newline="") as f:
+        csv.writer(f).writerows(ROWS)
+    path = str(tmp_path / "catalogue.sqlite3")
+    assert build(str(source), path) == 4
+    return Catalogue(path)
+
+
+def names(results):
+    return [r["name"] for r in results]
+
+
+def test_build_then_search(tmp_path):
+    catalogue = make_catalogue(tmp_path)
+    assert len(catalogue) == 4
+    assert names(catalogue.search("anchor milk")) == ["Blue Milk", "Trim Milk"]
+    assert names(catalogue.search("anchr mlk")) == ["Blue Milk", "Trim Milk"]  # typos
+    assert names(catalogue.search("farrahs wrap")) == ["Original Wraps"]
+    assert catalogue.search("anchor pizza") == []
+
+    blue, wraps = catalogue.search("blue milk")[0], catalogue.search("wraps")[0]
+    assert blue == {"name": "Blue Milk", "unit": "100ml", "cals": 66, "calc": "gram", "protein": 3.3}
+    assert wraps["cals"] == 165 and wraps["calc"] == "item"  # from kJ
+
+
+def test_ranks_like_the_in_memory_index(tmp_path):
+    catalogue = make_catalogue(tmp_path)
+    brands = {}
+    for brand, name, *_ in ROWS[1:5]:
+        brands.setdefault(brand, []).append({"name": name})
+    index = FoodIndex.build(brands)
+    for query in ["milk", "anchor milk", "anchr mlk", "butter", "wrap"]:
+        assert names(catalogue.search(query)) == names(index.search(query))
@@ -0,0 +1,61 @@
+from food_search import FoodIndex, tokenize, within_one_edit
+
+# A slice of the app's LOCAL_NZ_DB, plus one café menu item
+LOCAL_DB = {
+    "anchor": [
+        {"name": "Anchor Blue Milk (Standard)", "unit": "100ml", "cals": 63, "calc": "gram"},
+        {"name": "Anchor Lite Milk (Light Blue)", "unit": "100ml", "cals": 46, "calc": "gram"},
+        {"name": "Anchor Trim Milk (Green)", "unit": "100ml", "cals": 35, "calc": "gram"},
+        {"name": "Anchor Protein+ Yoghurt", "unit": "100g", "cals": 58, "calc": "gram"},
+        {"name": "Anchor Butter", "unit": "10g", "cals": 74, "calc": "gram"},
+    ],
+    "farrah": [
+        {"name": "Farrah's Garlic Butter Wrap", "unit": "1 Wrap", "cals": 216, "calc": "item"},
+    ],
+    "egg": [
+        {"name": "Egg (Large, Boiled/Poached)", "unit": "1 Egg", "cals": 74, "calc": "item"},
+        {"name": "Egg (Fried in Oil)", "unit": "1 Egg", "cals": 90, "calc": "item"},
+    ],
+}
+MENU = [{"name": "Flat White", "cals": "120", "desc": "Double shot with milk"}, {"name": "Daily Special", "cals": "?"}]
+ANCHOR_MILKS = {"Anchor Blue Milk (Standard)", "Anchor Lite Milk (Light Blue)", "Anchor Trim Milk (Green)"}
+
+
+def names(query):
+    return [item["name"] for item in FoodIndex.build(LOCAL_DB, MENU).search(query)]
+
+
+def test_milk_finds_the_anchor_milks_first():
+    found = names("milk")
+    assert set(found[:3]) == ANCHOR_MILKS
+    assert "Flat White" in found  # only through its description, so ranked after
+
+
+def test_every_query_token_must_match():
+    assert set(names("anchor milk")) == ANCHOR_MILKS  # no butter or yoghurt
+    assert names("garlic butter") == ["Farrah's Garlic Butter Wrap"]
+    assert names("anchor pizza") == []
+
+
+def test_typos_still_match():
+    assert set(names("anchr mlk")) == ANCHOR_MILKS
+    assert names("yoghrt") == ["Anchor Protein+ Yoghurt"]
+
+
+def test_plurals_and_prefixes():
+    assert tokenize("Eggs Farrah's glass") == ["egg", "farrah", "glass"]
+    assert set(names("eggs")) == {"Egg (Large, Boiled/Poached)", "Egg (Fried in Oil)"}
+    assert names("butt")[:2] == ["Anchor Butter", "Farrah's Garlic Butter Wrap"]
+    assert names("") == [] and names("daily special") == []  # no usable calories
+
+
+def test_within_one_edit():
+    assert within_one_edit("milk", "milk")      # identical
+    assert within_one_edit("mlik", "milk")      # adjacent swap
+    assert within_one_edit("mlk", "milk")       # insert
+    assert within_one_edit("milks", "milk")     # delete
+    assert within_one_edit("mulk", "milk")      # substitute
+    assert within_one_edit("", "a")
+    assert not within_one_edit("mkli", "milk")  # two swaps
+    assert not within_one_edit("ml", "milk")    # two inserts
+    assert not within_one_edit("mikl", "milks")
@@ -0,0 +1,67 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from importer import ChunkMapper, HashIndex, import_log, read_chunks, row_hashes
+from partitions import PartitionedLog
+from storage import CsvStore, LocalBackend
+
+
+def chunk(**columns):
+    return pd.DataFrame({k: pd.Series(v, dtype=object) for k, v in columns.items()})
+
+
+def test_energy_in_kj_becomes_kcal():
+    rows, rejected = ChunkMapper().map(chunk(date=["2026-10-01 08:00"], energy_kj=["1046"], food=["Oats"]))
+    assert rejected == 0
+    assert rows.loc[0, "calories"] == 250 and rows.loc[0, "notes"] == "Oats"
+
+
+def test_pounds_become_kg():
+    rows, _ = ChunkMapper().map(chunk(date=["2026-10-01"], weight_lbs=["154.32"]))
+    assert rows.loc[0, "weight"] == 70.0
+    rows, _ = ChunkMapper(lbs=True).map(chunk(date=["2026-10-01"], weight=["154.32"]))
+    assert rows.loc[0, "weight"] == 70.0
+
+
+def test_weight_carries_forward_per_user_across_chunks():
+    mapper = ChunkMapper()
+    first, _ = mapper.map(chunk(date=["2026-10-01", "2026-10-01", "2026-10-02"], user=["Me", "Sis", "Me"], weight=["70", "60", ""]))
+    assert list(first["weight"]) == [70.0, 60.0, 70.0]
+    second, _ = mapper.map(chunk(date=["2026-10-03", "2026-10-03"], user=["Sis", "Me"], weight=["", "69.5"]))
+    assert list(second["weight"]) == [60.0, 69.5]
+
+
+def test_unparseable_dates_are_rejected_and_meals_normalised():
+    rows, rejected = ChunkMapper().map(chunk(date=["17/10/2026 8:30am", "soon"], meal=["Late LUNCH", None]))
+    assert rejected == 1
+    assert list(rows["date"]) == ["2026-10-17 08:30"] and list(rows["meal_type"]) == ["Lunch"]
+
+
+def test_repeats_within_a_batch_are_dropped():
+    rows, _ = ChunkMapper().map(chunk(date=["2026-10-01 08:00"] * 3, calories=["400", "400.0", "401"], notes=["Oats"] * 3))
+    index = HashIndex()
+    keep = index.new_mask(row_hashes(rows))
+    assert list(keep) == [True, False, True]
+    index.add(row_hashes(rows)[keep])
+    assert not index.new_mask(row_hashes(rows)).any()
+
+
+def test_json_array_and_json_lines(tmp_path):
+    records = [{"date": "2026-10-01 08:00", "calories": 300, "food": "Toast"}, {"date": "2026-10-02 08:00", "calories": 200, "food": "Eggs"}]
+    array = io.BytesIO(json.dumps(records, indent=2).encode())
+    array.name = "export.json"
+    lines = io.BytesIO("\n".join(json.dumps(r) for r in records).encode())
+    lines.name = "export.json"
+    for source in (array, lines):
+        frames = list(read_chunks(source, chunksize=1))
+        assert [len(f) for f in frames] == [1, 1]
+        assert list(pd.concat(frames)["food"]) == ["Toast", "Eggs"]
+
+    log = PartitionedLog(CsvStore(LocalBackend(str(tmp_path))))
+    array.seek(0)
+    report = import_log(log, array, user="Me")
+    assert (report.read, report.imported, report.rejected) == (2, 2, 0)
+    assert list(np.sort(pd.to_numeric(log.read("Me")["calories"]))) == [200, 300]
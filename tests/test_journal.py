@@ -0,0 +1,31 @@
+import pytest
+
+from journal import WriteBehindJournal
+
+
+class Log:
+    def __init__(self):
+        self.down = False
+        self.rows = []
+
+    def append(self, rows, message):
+        if self.down:
+            raise ConnectionError("rate limited")
+        self.rows += rows.to_dict("records")
+
+
+def test_failed_flush_is_reported_and_retried():
+    log = Log()
+    journal = WriteBehindJournal(log, debounce=60)
+    journal.append({"user": "Me", "calories": 100}, "Log")
+    log.down = True
+    with pytest.raises(ConnectionError):
+        journal.flush()
+    assert isinstance(journal.last_error, ConnectionError)
+    assert len(journal.pending_rows()) == 1
+    assert journal._timer is not None  # a foreground failure still leaves a retry queued
+
+    log.down = False
+    assert journal.flush() == 1
+    assert journal.last_error is None
+    assert journal.pending_rows() == [] and len(log.rows) == 1
@@ -0,0 +1,67 @@
+import pytest
+
+from model_router import CircuitBreaker, ModelRouter, ModelUnavailable
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Backend:
+    def __init__(self, text):
+        self.text = text
+        self.down = False
+        self.calls = 0
+
+    def __call__(self, prompt):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("down")
+        return self.text
+
+
+def test_breaker_half_open_allows_one_trial():
+    clock = Clock()
+    breaker = CircuitBreaker(failures=1, cooldown=10, clock=clock)
+    breaker.record(False)
+    assert not breaker.allow()
+    clock.now = 10
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed"
+
+
+def test_unused_fallback_keeps_its_half_open_trial():
+    clock = Clock()
+    flash, pro = Backend("flash"), Backend("pro")
+    router = ModelRouter([("flash", flash), ("pro", pro)], hedge_after=5.0, deadline=5.0,
+                         breaker=lambda: CircuitBreaker(failures=1, cooldown=60, clock=clock))
+    router.breakers["pro"].record(False)
+    clock.now = 60
+
+    # Flash answers well before hedge_after, so pro is never started...
+    for _ in range(3):
+        assert router.generate("q") == "flash"
+    assert pro.calls == 0
+    # ...and must still be available once flash goes down
+    assert router.breakers["pro"].state == "half-open"
+    assert router.breakers["pro"].allow()
+    router.breakers["pro"].release()
+    flash.down = True
+    assert router.generate("q") == "pro"
+    assert router.breakers["pro"].state == "closed"
+
+
+def test_all_open_is_reported_as_circuit_broken():
+    clock = Clock()
+    router = ModelRouter([("flash", Backend("flash"))], breaker=lambda: CircuitBreaker(failures=1, clock=clock))
+    router.breakers["flash"].record(False)
+    with pytest.raises(ModelUnavailable, match="circuit-broken"):
+        router.generate("q")
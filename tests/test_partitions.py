@@ -0,0 +1,87 @@
+from datetime import date
+
+import pandas as pd
+
+from fake_github import FakeRepo, github_backend
+from partitions import PartitionedLog
+from storage import CsvStore
+
+
+def open_log(repo):
+    # One app process: its own client, listing cache and frame cache
+    return PartitionedLog(CsvStore(github_backend(repo)), backoff=0)
+
+
+def row(notes, calories=100):
+    return {"date": "2026-10-17 08:00", "user": "Me", "weight": 70.0, "calories": calories, "notes": notes, "meal_type": "Snack"}
+
+
+def test_append_rebases_onto_another_writers_commit():
+    repo = FakeRepo()
+    first = open_log(repo)
+    first.append([row("Oats")], "Log")
+    first.migrate()
+    other = open_log(repo)
+    assert list(first.read("Me")["notes"]) == ["Oats"]
+    assert list(other.read("Me")["notes"]) == ["Oats"]
+
+    # Inside first's listing TTL, so its cached SHAs are now stale
+    other.append([row("Banana")], "Log")
+    first.append([row("Toast")], "Log")
+
+    assert sorted(open_log(repo).read("Me")["notes"]) == ["Banana", "Oats", "Toast"]
+
+
+def test_modify_rebases_onto_another_writers_commit():
+    repo = FakeRepo()
+    first = open_log(repo)
+    first.append([row("Oats"), row("Eggs", 150)], "Log")
+    first.migrate()
+    other = open_log(repo)
+    first.read("Me")
+    other.read("Me")
+
+    other.append([row("Banana")], "Log")
+    first.modify("Me", "2026-10", lambda df: df[df["notes"] != "Eggs"].reset_index(drop=True), "Edit")
+
+    df = open_log(repo).read("Me")
+    assert sorted(df["notes"]) == ["Banana", "Oats"]
+    assert pd.to_numeric(df["calories"]).sum() == 200
+
+
+def test_recent_read_fetches_only_recent_shards():
+    repo = FakeRepo()
+    log = open_log(repo)
+    log.append([{**row(n), "date": f"2026-{m:02d}-10 08:00"} for m, n in [(3, "Mar"), (5, "May"), (9, "Sep"), (10, "Oct")]], "Log")
+    log.migrate()
+    fetched = []
+    get_blob = repo.get_git_blob
+    repo.get_git_blob = lambda sha: fetched.append(sha) or get_blob(sha)
+
+    fresh = open_log(repo)
+    months = fresh.recent_months("Me", today=date(2026, 10, 17))
+    assert months == {"2026-09", "2026-10"}
+    df = fresh.read("Me", months=months)
+    assert sorted(df["notes"]) == ["Oct", "Sep"]
+    assert len(fetched) == 3  # manifest + two shards
+
+    # The latest logged month is always included, for the last weight
+    assert fresh.recent_months("Me", today=date(2027, 6, 1)) == {"2026-10", "2027-05", "2027-06"}
+
+
+def test_import_into_unmigrated_log_keeps_existing_rows(tmp_path):
+    from importer import import_log
+
+    repo = FakeRepo()
+    # Rows left blank by the old in-app repair
+    repo.put("data.csv", b"date,user,weight,calories,notes,meal_type\n2026-10-01 08:00,Me,70.0,100,Oats,\n2026-10-01 12:00,Me,70.0,0,,\n")
+    source = tmp_path / "import.csv"
+    pd.DataFrame([row("Toast", 250), row("Eggs", 150)]).to_csv(source, index=False)
+
+    import_log(open_log(repo), str(source))
+
+    df = open_log(repo).read("Me")
+    assert not open_log(repo).partitioned
+    assert list(df["notes"]) == ["Oats", "", "Toast", "Eggs"]
+    assert list(pd.to_numeric(df["calories"])) == [100, 0, 250, 150]
+    assert list(df["meal_type"]) == ["", "", "Snack", "Snack"] and df["id"].is_unique
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from rowdiff import apply_diff, diff_rows
+
+COLUMNS = ["meal_type", "notes", "calories"]
+
+
+def day():
+    return pd.DataFrame({
+        "id": ["a1", "b2", "c3"],
+        "meal_type": ["Breakfast", "Lunch", "Dinner"],
+        "notes": ["Oats", "Sushi", "Stir fry"],
+        "calories": [320, 380, 480],
+    })
+
+
+def test_editor_frame_with_hidden_id_column():
+    original = day()
+    # What st.data_editor hands back: same RangeIndex, one row edited, one
+    # deleted, one added at the bottom with no id (None or NaN)
+    edited = original.drop(index=1).reset_index(drop=True)
+    edited.loc[0, "calories"] = 350
+    edited = pd.concat([edited, pd.DataFrame([{"id": None, "meal_type": "Snack", "notes": "Apple", "calories": 80}])], ignore_index=True)
+    edited.loc[len(edited)] = [float("nan"), "Snack", "Tea", 20]
+
+    diff = diff_rows(original, edited, COLUMNS)
+
+    assert diff.updates == {"a1": {"calories": 350}}
+    assert diff.deletes == ["b2"]
+    assert [r["notes"] for r in diff.inserts] == ["Apple", "Tea"]
+
+
+def test_unchanged_editor_frame_is_empty_diff():
+    assert not diff_rows(day(), day(), COLUMNS)
+
+
+def test_blank_added_rows_are_ignored():
+    edited = pd.concat([day(), pd.DataFrame([{"id": "", "meal_type": None, "notes": None, "calories": None}])], ignore_index=True)
+    assert not diff_rows(day(), edited, COLUMNS)
+
+
+def test_apply_gives_inserts_new_ids():
+    original = day()
+    edited = pd.concat([original, pd.DataFrame([{"id": None, "meal_type": "Snack", "notes": "Apple", "calories": 80}])], ignore_index=True)
+    shard = original.assign(date="2026-10-17 08:00", user="Me", weight=70.0)
+    out = apply_diff(shard, diff_rows(original, edited, COLUMNS), {"date": "2026-10-17 08:00", "user": "Me", "weight": 70.0})
+    assert len(out) == 4
+    assert out["id"].notna().all() and out["id"].is_unique
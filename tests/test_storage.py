@@ -0,0 +1,34 @@
+import pytest
+from github import GithubException
+
+from fake_github import FakeRepo, github_backend
+from partitions import PartitionedLog
+from storage import CsvStore
+
+
+def test_missing_directory_reads_as_empty():
+    backend = github_backend(FakeRepo())
+    assert backend.sha("data/manifest.json") is None
+
+
+def test_failed_listing_raises_and_is_not_cached():
+    repo = FakeRepo()
+    repo.put("profiles.csv", b"user,start_weight\nMe,70\n")
+    backend = github_backend(repo)
+    repo.fail_listing = 403
+    with pytest.raises(GithubException):
+        backend.sha("profiles.csv")
+    repo.fail_listing = None
+    assert backend.sha("profiles.csv") is not None
+
+
+def test_failed_listing_does_not_fall_back_to_legacy_file():
+    repo = FakeRepo()
+    log = PartitionedLog(CsvStore(github_backend(repo, listing_ttl=0)), backoff=0)
+    log.append([{"date": "2026-10-17 08:00", "user": "Me", "weight": 70.0, "calories": 100, "notes": "Oats", "meal_type": "Snack"}], "Log")
+    log.migrate()
+    legacy = repo.files()["data.csv"]
+    repo.fail_listing = 503
+    with pytest.raises(GithubException):
+        log.append([{"date": "2026-10-17 09:00", "user": "Me", "weight": 70.0, "calories": 50, "notes": "Tea", "meal_type": "Snack"}], "Log")
+    assert repo.files()["data.csv"] == legacy
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from trends import TrendsEngine
+
+
+def history(days):
+    dt = pd.date_range("2026-01-01 08:00", periods=days, freq="D")
+    return pd.DataFrame({"dt": dt, "weight": 70.0, "calories": 2000})
+
+
+def test_charts_only_load_the_history_on_a_miss():
+    engine = TrendsEngine(max_points=50)
+    loads = []
+
+    def load():
+        loads.append(1)
+        return history(200)
+
+    weight, calories = engine.charts("Me", "v1", load, "D")
+    assert len(weight) == 50 and len(calories) == 50
+    engine.charts("Me", "v1", load, "D")
+    assert len(loads) == 1
+
+    # A new data version or frequency is a new entry
+    engine.charts("Me", "v2", load, "D")
+    engine.charts("Me", "v2", load, "W-MON")
+    assert len(loads) == 3
@@ -0,0 +1,249 @@
+import contextvars
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+
+_current = contextvars.ContextVar("sisfit_span", default=None)
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "end", "children", "counters")
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+        self.counters = {}
+
+    @property
+    def ms(self):
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def totals(self):
+        # Counters summed over this span and everything under it
+        out = dict(self.counters)
+        for child in self.children:
+            for key, n in child.totals().items():
+                out[key] = out.get(key, 0) + n
+        return out
+
+    def flatten(self, origin=None, depth=0):
+        origin = self.start if origin is None else origin
+        rows = [{
+            "name": self.name, "depth": depth, "start_ms": round((self.start - origin) * 1000, 2),
+            "ms": round(self.ms, 2), **({"attrs": self.attrs} if self.attrs else {}),
+            **({"counters": self.counters} if self.counters else {}),
+        }]
+        for child in self.children:
+            rows += child.flatten(origin, depth + 1)
+        return rows
+
+
+# --- Instrumentation ---
+# Both are no-ops unless a trace is open in the calling thread/context, so the
+# storage and model modules can be instrumented unconditionally. Work done on
+# pool threads (hedged model calls, background journal flushes) is not traced
+# unless it is submitted through carry().
+@contextmanager
+def span(name, **attrs):
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    s = Span(name, attrs)
+    parent.children.append(s)
+    token = _current.set(s)
+    try:
+        yield s
+    finally:
+        s.end = time.perf_counter()
+        _current.reset(token)
+
+
+def traced(name):
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def carry(fn):
+    # fn bound to a copy of the caller's context, for a pool thread: its spans
+    # nest under the caller's current span. One copy per task, since a
+    # context can't be entered by two threads at once.
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+def count(key, n=1):
+    s = _current.get()
+    if s is not None:
+        s.counters[key] = s.counters.get(key, 0) + n
+
+
+# --- Tracer ---
+# One trace per Streamlit rerun. A rerun can end early (st.rerun / st.stop
+# raise out of the script), so an unfinished trace is closed when the same
+# session begins its next one, timed up to its last finished span.
+class Tracer:
+    def __init__(self, path=None, keep=200, max_bytes=20 * 2**20):
+        if path is None:
+            path = os.environ.get("SISFIT_TRACE_FILE")
+        if path is None:
+            root = os.environ.get("SISFIT_CACHE_DIR") or tempfile.gettempdir()
+            os.makedirs(root, exist_ok=True)
+            path = os.path.join(root, "sisfit-trace.jsonl")
+        self.path = path  # "" disables the file
+        self.max_bytes = max_bytes
+        self.recent = deque(maxlen=keep)
+        self._open = {}
+        self._started = False
+        self._lock = threading.Lock()
+
+    def begin(self, session, name="rerun", start=None, **attrs):
+        with self._lock:
+            previous = self._open.pop(session, None)
+            cold = not self._started
+            self._started = True
+        if previous is not None:
+            self._finish(session, previous, "interrupted")
+        root = Span(name, attrs)
+        if start is not None:
+            root.start = start  # e.g. the top of the script, so imports count
+        if cold:
+            root.attrs["cold"] = True
+        with self._lock:
+            self._open[session] = root
+        _current.set(root)
+        return root
+
+    def rendered(self, root):
+        # Time to first render: the trace's start up to the first useful paint.
+        # The process's first rerun (a cold worker) also records how long
+        # the process had been up by then, server start-up included.
+        if "first_render_ms" in root.attrs:
+            return
+        root.attrs["first_render_ms"] = round(root.ms, 1)
+        if root.attrs.get("cold"):
+            age = process_age()
+            if age is not None:
+                root.attrs["process_ms"] = round(age * 1000, 1)
+
+    def end(self, session):
+        with self._lock:
+            root = self._open.pop(session, None)
+        _current.set(None)
+        if root is not None:
+            return self._finish(session, root, "ok")
+
+    def _finish(self, session, root, status):
+        if status == "ok":
+            root.end = time.perf_counter()
+        else:
+            root.end = max([c.end for c in root.children if c.end] or [root.start])
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "trace": root.name,
+            "session": session,
+            "status": status,
+            "ms": round(root.ms, 2),
+            **({"attrs": root.attrs} if root.attrs else {}),
+            "counters": root.totals(),
+            "spans": root.flatten()[1:],
+        }
+        self.recent.append(record)
+        if self.path:
+            self._write(record)
+        return record
+
+    def _write(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            try:
+                if os.path.getsize(self.path) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+            except OSError:
+                pass
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def percentiles(self, records=None):
+        return summarise(self.recent if records is None else records)
+
+
+def process_age():
+    # Seconds since this process started; Linux only, None elsewhere
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def summarise(records):
+    # {span name: (count, p50 ms, p95 ms)}, with whole reruns under the trace
+    # name and time to first render split into cold (new process) and warm
+    samples = defaultdict(list)
+    for record in records:
+        samples[record["trace"]].append(record["ms"])
+        attrs = record.get("attrs", {})
+        if "first_render_ms" in attrs:
+            samples["first_render.cold" if attrs.get("cold") else "first_render"].append(attrs["first_render_ms"])
+        if "process_ms" in attrs:
+            samples["first_render.process"].append(attrs["process_ms"])
+        for s in record["spans"]:
+            samples[s["name"]].append(s["ms"])
+    return {name: (len(v), _pct(v, 0.5), _pct(v, 0.95)) for name, v in samples.items()}
+
+
+def read_records(path, since=None):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if since is None or record["ts"] >= since:
+                yield record
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="p50/p95 per span from a trace log")
+    parser.add_argument("path", nargs="?", default=Tracer(path=None).path)
+    parser.add_argument("--since", help="ISO timestamp, e.g. 2026-10-01")
+    parser.add_argument("--by-day", action="store_true", help="Rerun p50/p95 and cold first render per day, for graphing")
+    args = parser.parse_args()
+    records = list(read_records(args.path, args.since))
+    if args.by_day:
+        days, cold = defaultdict(list), defaultdict(list)
+        for r in records:
+            days[r["ts"][:10]].append(r["ms"])
+            if r.get("attrs", {}).get("cold") and "first_render_ms" in r["attrs"]:
+                cold[r["ts"][:10]].append(r["attrs"]["first_render_ms"])
+        print("day,reruns,p50_ms,p95_ms,cold_starts,cold_render_p50_ms")
+        for day, values in sorted(days.items()):
+            print(f"{day},{len(values)},{_pct(values, 0.5):.1f},{_pct(values, 0.95):.1f},{len(cold[day])},{_pct(cold[day], 0.5):.1f}")
+    else:
+        print(f"{'span':32} {'count':>7} {'p50 ms':>9} {'p95 ms':>9}")
+        for name, (n, p50, p95) in sorted(summarise(records).items(), key=lambda kv: -kv[1][2]):
+            print(f"{name:32} {n:7} {p50:9.1f} {p95:9.1f}")
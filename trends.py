@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from storage import LRUCache
+
+FREQUENCIES = {"Daily": "D", "Weekly": "W-MON", "Monthly": "MS"}
+
+
+# --- Resampling ---
+def daily_series(history):
+    # One row per calendar day: last weight (carried forward over gaps),
+    # calorie total, and rolling 7/30-day calorie averages
+    if history.empty:
+        return pd.DataFrame(columns=["weight", "calories", "cal_7d", "cal_30d"])
+    frame = pd.DataFrame({
+        "weight": pd.to_numeric(history["weight"], errors="coerce").where(lambda w: w > 0).to_numpy(),
+        "calories": pd.to_numeric(history["calories"], errors="coerce").fillna(0).to_numpy(),
+    }, index=pd.DatetimeIndex(history["dt"]))
+    frame = frame[frame.index.notna()].sort_index(kind="stable")
+    daily = frame.resample("D").agg({"weight": "last", "calories": "sum"})
+    daily["weight"] = daily["weight"].ffill()
+    daily["cal_7d"] = daily["calories"].rolling(7, min_periods=1).mean()
+    daily["cal_30d"] = daily["calories"].rolling(30, min_periods=1).mean()
+    return daily
+
+
+def resample(daily, freq):
+    if freq == "D" or daily.empty:
+        return daily
+    out = daily.resample(freq).agg({"weight": "last", "calories": "sum", "cal_7d": "last", "cal_30d": "last"})
+    return out.dropna(how="all")
+
+
+# --- Downsampling ---
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: keeps the visual shape (peaks, dips)
+    # of a line with far fewer points. Returns the indices to keep.
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(series, max_points):
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    keep = lttb(series.index.asi8, series.to_numpy(), max_points)
+    return series.iloc[keep]
+
+
+# --- Engine ---
+# Cached per (user, data version, frequency, point cap), so reruns that don't
+# change the log reuse the prepared chart frames. The history is passed as a
+# loader and only read on a miss, so a cached rerun doesn't touch storage.
+class TrendsEngine:
+    def __init__(self, max_points=400, max_entries=16):
+        self.max_points = max_points
+        self.cache = LRUCache(max_entries=max_entries, ttl=None)
+
+    def charts(self, user, version, load, freq="D"):
+        key = (user, version, freq, self.max_points)
+        result = self.cache.get(key)
+        if result is None:
+            series = resample(daily_series(load()), freq)
+            weight = downsample(series["weight"], self.max_points)
+            calories = series[["calories", "cal_7d", "cal_30d"]]
+            if len(calories) > self.max_points:
+                calories = calories.loc[downsample(calories["cal_7d"], self.max_points).index]
+            result = (
+                weight.rename_axis("date").reset_index(),
+                calories.rename_axis("date").reset_index(),
+            )
+            self.cache.put(key, result)
+        return result